@@ -1,35 +1,62 @@
 import os
+import sys
 import time
 import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import pyaudiowpatch as pyaudio
-import wave
+import struct
 import speech_recognition as sr
 from datetime import datetime
-from pydub import AudioSegment
-from pydub.utils import which
-import tempfile
 import queue
-import io
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import mmap
+import shutil
 import subprocess
-import whisper
 import logging
 from logging.handlers import QueueHandler
 import torch
 import numpy as np
 import psutil
 import gc
-from scipy import signal
+import importlib.util
+import importlib.metadata
+import json
 from enum import Enum
 from dataclasses import dataclass
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, Union
 
-try:
-    from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+# transformers导入较慢，只检测是否安装，加载BELLE模型时再导入
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+
+# faster-whisper会连带导入ctranslate2和av，只检测是否安装，加载模型时再导入
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+
+# bitsandbytes仅用于可选的int8量化，只检测是否安装，避免启动时初始化CUDA
+BITSANDBYTES_AVAILABLE = importlib.util.find_spec("bitsandbytes") is not None
+
+# numba只用于3声道以上设备的混音，只检测是否安装，首次混音时再导入并编译
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# 允许FP32矩阵乘法使用TF32，在支持的GPU上提升速度
+torch.set_float32_matmul_precision("high")
+
+# 录音文件目录，固定在程序所在目录下，不受当前工作目录变化影响
+AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio")
+
+# PyAudio采样格式对应的每个采样字节数
+_FMT_WIDTH = {
+    pyaudio.paInt8: 1,
+    pyaudio.paUInt8: 1,
+    pyaudio.paInt16: 2,
+    pyaudio.paInt24: 3,
+    pyaudio.paInt32: 4,
+    pyaudio.paFloat32: 4,
+}
+
+# 句末标点，转写文本在其后换行
+_SENTENCE_END_TABLE = str.maketrans({'。': '。\n', '！': '！\n', '？': '？\n'})
 
 
 class AudioSource(Enum):
@@ -45,12 +72,152 @@ class TranscriptionConfig:
     engine_type: str = "google"
     language: str = "zh-CN"
     chunk_size: int = 1024
+    frames_per_buffer: Optional[int] = None  # PortAudio内部缓冲帧数，默认为chunk_size的4倍
     sample_rate: int = 16000
     channels: int = 1
     format: int = pyaudio.paInt16
     buffer_duration: int = 5
     error_log_interval: int = 10
+    max_batch_size: int = 16
+    silence_rms_threshold: float = 200.0  # 低于此RMS（int16幅度）的片段视为静音，不送转写；0表示不过滤
+    belle_ct2: bool = True  # 已安装faster-whisper时，BELLE模型转换为CTranslate2格式（首次加载时转换并缓存）运行
+    quantize_int8: bool = False  # GPU上以bitsandbytes int8权重加载BELLE模型，显存约减半，需安装bitsandbytes
+    max_merge_seconds: int = 30  # 模型不支持批量推理时，积压片段拼接为一次转写的时长上限（秒），Whisper单次输入为30秒
+    inference_timeout: float = 120.0  # 转写线程等待推理线程返回一个片段结果的最长时间（秒）
     cleanup_log_interval: int = 20
+    
+    def __post_init__(self):
+        # 内部缓冲大于每次读取的chunk_size，PortAudio可成批传输，低性能设备上不易溢出
+        if self.frames_per_buffer is None:
+            self.frames_per_buffer = self.chunk_size * 4
+
+
+def _drain_queue(q: queue.Queue):
+    """在队列锁内一次性清空队列，并唤醒等待join的线程"""
+    with q.mutex:
+        q.queue.clear()
+        q.unfinished_tasks = 0
+        q.all_tasks_done.notify_all()
+        q.not_full.notify_all()
+
+
+@dataclass
+class DeviceSpec:
+    """音频输入设备信息，扫描设备时从PortAudio返回的字典转换一次"""
+    index: int
+    name: str
+    channels: int
+    rate: int
+    is_loopback: bool
+
+
+def _as_int16(pcm: Union[bytes, np.ndarray]) -> np.ndarray:
+    """将16位PCM数据视为int16数组；bytes以零拷贝方式解释，数组原样返回"""
+    if isinstance(pcm, np.ndarray):
+        return pcm
+    return np.frombuffer(pcm, dtype=np.int16)
+
+
+def _wav_pcm_view(buf) -> memoryview:
+    """返回音频数据中16位PCM样本部分的内存视图（零拷贝）：WAV文件跳过文件头，其余数据整体视为PCM"""
+    view = memoryview(buf)
+    if len(view) >= 12 and view[0:4] == b'RIFF' and view[8:12] == b'WAVE':
+        pos = 12
+        while pos + 8 <= len(view):
+            chunk_id = bytes(view[pos:pos + 4])
+            chunk_size = int.from_bytes(view[pos + 4:pos + 8], 'little')
+            pos += 8
+            if chunk_id == b'data':
+                view = view[pos:pos + chunk_size]
+                break
+            pos += chunk_size + (chunk_size & 1)  # 块按偶数字节对齐
+    # int16解释要求字节数为偶数
+    return view[:len(view) & ~1]
+
+
+class PcmSegmentBuffer:
+    """预分配的int16样本缓冲区：录音线程逐块写入，每个转写片段整体取出一次"""
+    
+    def __init__(self, capacity: int):
+        self._data = np.empty(capacity, dtype=np.int16)
+        self._size = 0
+        
+    def __len__(self) -> int:
+        return self._size
+        
+    def write(self, pcm) -> bool:
+        """追加一块16位PCM数据；剩余空间不足时不写入并返回False"""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        end = self._size + len(samples)
+        if end > len(self._data):
+            return False
+        self._data[self._size:end] = samples
+        self._size = end
+        return True
+        
+    def take(self) -> np.ndarray:
+        """取出已缓冲的样本（独立副本，缓冲区会被继续复用）并清空"""
+        segment = self._data[:self._size].copy()
+        self._size = 0
+        return segment
+        
+    def clear(self):
+        self._size = 0
+
+
+def _wav_header(data_size: int, sample_rate: int, channels: int, sample_width: int) -> bytes:
+    """生成44字节的PCM WAV文件头"""
+    block_align = channels * sample_width
+    return struct.pack('<4sI4s4sIHHIIHH4sI',
+                       b'RIFF', 36 + data_size, b'WAVE',
+                       b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align,
+                       block_align, sample_width * 8,
+                       b'data', data_size)
+
+
+def _pcm16_rms(pcm: Union[bytes, np.ndarray]) -> float:
+    """计算16位PCM数据的RMS能量（int16幅度单位）"""
+    pcm = _as_int16(pcm)
+    if pcm.size == 0:
+        return 0.0
+    # int16平方最大约1.07e9，int32可精确容纳；均值按float64累加，不会溢出
+    samples = pcm.astype(np.int32)
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+def _mix_to_mono_i16(src, channels, dst):
+    """多声道int16交错数据混为单声道：单次遍历，int32累加后求平均，结果写入dst"""
+    for i in range(dst.shape[0]):
+        acc = np.int32(0)
+        base = i * channels
+        for c in range(channels):
+            acc += src[base + c]
+        dst[i] = acc // channels
+
+
+_MIX_KERNEL = None
+
+def _mix_kernel():
+    """返回numba编译的_mix_to_mono_i16，首次调用时导入numba并编译；numba不可用时返回None
+    
+    njit在首次调用时才编译，这里先用一小段数据试跑并核对结果，
+    导入、编译或结果任一出错都关闭numba，改用NumPy混音。
+    """
+    global _MIX_KERNEL, NUMBA_AVAILABLE
+    if _MIX_KERNEL is None and NUMBA_AVAILABLE:
+        try:
+            from numba import njit
+            kernel = njit(cache=True)(_mix_to_mono_i16)
+            src = np.array([3, 6, 9, -3, -6, -9], dtype=np.int16)
+            dst = np.empty(2, dtype=np.int16)
+            kernel(src, 3, dst)
+            if dst.tolist() != [6, -6]:
+                raise ValueError(f"混音内核结果不正确: {dst.tolist()}")
+            _MIX_KERNEL = kernel
+        except Exception as e:
+            NUMBA_AVAILABLE = False
+            logging.getLogger(__name__).warning(f"numba混音内核不可用，改用NumPy: {str(e)}")
+    return _MIX_KERNEL
 
 
 class QueueLogHandler(QueueHandler):
@@ -65,6 +232,28 @@ class QueueLogHandler(QueueHandler):
 class AudioTranscriptionEngine:
     """音频转写引擎 - 统一处理所有转写逻辑"""
     
+    # Whisper/BELLE模型要求的输入采样率
+    MODEL_SAMPLE_RATE = 16000
+    
+    # Whisper单个解码窗口（30秒）的采样点数
+    WINDOW_SAMPLES = MODEL_SAMPLE_RATE * 30
+    
+    BELLE_MODEL_ID = "BELLE-2/Belle-whisper-large-v3-turbo-zh"
+    
+    # BELLE模型CTranslate2转换结果的缓存目录
+    CT2_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "reco-tran", "belle-ct2")
+    
+    # CTranslate2转换失败后，同一版本的转换器在这段时间内（秒）不再重试
+    CT2_RETRY_AFTER = 24 * 3600
+    
+    # 转换器错误输出中出现这些内容时视为网络等临时故障，下次加载照常重试
+    CT2_TRANSIENT_ERRORS = ("ConnectionError", "ConnectTimeout", "ReadTimeout", "Max retries exceeded",
+                            "Temporary failure in name resolution", "LocalEntryNotFoundError",
+                            "IncompleteRead", "ChunkedEncodingError")
+    
+    # faster-whisper对应的模型名称
+    FASTER_WHISPER_MODELS = {"turbo": "large-v3-turbo", "small": "small", "base": "base", "tiny": "tiny"}
+    
     def __init__(self, config: TranscriptionConfig, logger_func: Callable[[str, str], None]):
         self.config = config
         self.log = logger_func
@@ -72,56 +261,216 @@ class AudioTranscriptionEngine:
         self.whisper_model = None
         self.belle_pipeline = None  # BELLE模型管道
         self.model_type = "belle"  # 默认使用BELLE模型
-        self.audio = pyaudio.PyAudio()
-        
-    def transcribe_audio_data(self, audio_data: list, source_type: AudioSource) -> Optional[str]:
-        """转写音频数据的通用方法"""
-        try:
-            audio_bytes = b''.join(audio_data)
-            temp_file_path = self._create_temp_audio_file(audio_bytes, source_type)
-            
-            if not temp_file_path:
-                return None
+        self.whisper_backend = None  # 原生模型后端: "faster_whisper" 或 "whisper"
+        self._sample_width = _FMT_WIDTH[config.format]  # 采样格式不变，只查询一次
+        
+        # 模型输入的梅尔特征固定为30秒窗口，形状不变，允许cuDNN为卷积选择最快算法
+        if torch.cuda.is_available():
+            torch.backends.cudnn.benchmark = True
+        
+        # 每个线程独立的float32转换缓冲区（推理线程与文件转写线程可能并发运行）
+        self._thread_local = threading.local()
+        
+        # 推理请求队列：麦克风与系统音频的片段由同一个推理线程合批处理
+        self._inference_queue = queue.Queue()
+        self._inference_thread = None
+        self._inference_lock = threading.Lock()
+        self._inference_closed = False  # shutdown()后不再接受新的请求
+        
+        # 时间戳缓存：(整秒, "HH:MM:SS")，同一秒内的片段复用同一字符串
+        self._timestamp_cache = (0, "")
+        
+    def prewarm(self):
+        """加载模型并用一秒静音试跑一次，使首个真实片段不再承担初始化耗时"""
+        self.load_whisper_model()
+        # 试跑触发cuDNN/cuBLAS算法选择等一次性初始化；失败不影响模型使用
+        self._transcribe_with_whisper(np.zeros(self.MODEL_SAMPLE_RATE, dtype=np.float32))
+        
+    def submit(self, pcm: Union[bytes, np.ndarray], source_type: AudioSource) -> Future:
+        """提交一个音频片段到推理线程，返回在转写完成后给出文本的Future"""
+        future = Future()
+        with self._inference_lock:
+            if self._inference_closed:
+                # 停止标记之后入队的请求不会再被处理，直接以异常结束
+                future.set_exception(RuntimeError("转写引擎已关闭"))
+                return future
+            if self._inference_thread is None or not self._inference_thread.is_alive():
+                self._inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
+                self._inference_thread.start()
+            self._inference_queue.put((pcm, source_type, future))
+        return future
+        
+    def shutdown(self):
+        """通知推理线程退出；已提交的请求处理完后退出，之后提交的请求立即失败"""
+        with self._inference_lock:
+            if self._inference_closed:
+                return
+            self._inference_closed = True
+            self._inference_queue.put(None)
+        
+    def _inference_loop(self):
+        """推理线程：取出所有来源已积压的请求，合为一批转写"""
+        while True:
+            request = self._inference_queue.get()
+            if request is None:
+                break
+                
+            requests = [request]
+            while len(requests) < self.config.max_batch_size:
+                try:
+                    request = self._inference_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    # 放回停止标记，处理完已取出的请求后退出
+                    self._inference_queue.put(None)
+                    break
+                requests.append(request)
                 
             try:
-                text = self._perform_recognition(temp_file_path)
-                if text and text.strip():
-                    return self._format_transcription_text(text)
-                return None
-            finally:
-                self._cleanup_temp_file(temp_file_path)
+                texts = self.transcribe_batch([item[0] for item in requests],
+                                              [item[1] for item in requests])
+                for (_, _, future), text in zip(requests, texts):
+                    future.set_result(text)
+            except Exception as e:
+                for _, _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+        
+    def supports_batch_inference(self) -> bool:
+        """当前模型能否一次调用并行转写多个片段（目前只有BELLE管道）"""
+        return self.config.engine_type == "whisper" and self.belle_pipeline is not None
+        
+    def transcribe_audio_data(self, pcm: Union[bytes, np.ndarray], source_type: AudioSource) -> Optional[str]:
+        """转写音频数据的通用方法，pcm为一个完整片段的16位PCM数据（bytes或int16数组）"""
+        try:
+            # 音频全程保留在内存中，不再经过临时WAV文件
+            if self.config.engine_type == "whisper":
+                text = self._transcribe_with_whisper(
+                    self._pcm_to_model_input(pcm, self._source_channels(source_type)))
+            else:
+                text = self._transcribe_with_google(pcm)
+                    
+            if text and text.strip():
+                return self._format_transcription_text(text)
+            return None
                 
         except Exception as e:
             self.log("error", f"{source_type.value}转写处理错误: {str(e)}")
             return None
     
-    def _create_temp_audio_file(self, audio_bytes: bytes, source_type: AudioSource) -> Optional[str]:
-        """创建临时音频文件"""
-        try:
-            suffix = f"_{source_type.value}.wav"
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
-                temp_file_path = temp_file.name
-                
-            with wave.open(temp_file_path, 'wb') as wf:
-                wf.setnchannels(self.config.channels)
-                wf.setsampwidth(self.audio.get_sample_size(self.config.format))
-                wf.setframerate(self.config.sample_rate)
-                wf.writeframes(audio_bytes)
-                
-            return temp_file_path
-        except Exception as e:
-            self.log("error", f"创建临时音频文件失败: {str(e)}")
-            return None
+    def transcribe_batch(self, audio_items: list, source_types: list) -> list:
+        """批量转写多个音频片段，返回与输入顺序一致的结果列表
+        
+        source_types与audio_items一一对应，同一批可以混合不同音频源。
+        BELLE模型可用时合并为一次管道调用，其余情况逐个转写。
+        """
+        if self.config.engine_type == "whisper" and len(audio_items) > 1:
+            try:
+                if self.belle_pipeline is None and self.whisper_model is None:
+                    self.load_whisper_model()
+                if self.belle_pipeline is not None:
+                    return self._transcribe_batch_with_belle(audio_items, source_types)
+            except Exception as e:
+                names = "、".join(sorted({source_type.value for source_type in source_types}))
+                self.log("error", f"{names}批量转写错误: {str(e)}")
+                return [None] * len(audio_items)
+        return [self.transcribe_audio_data(pcm, source_type)
+                for pcm, source_type in zip(audio_items, source_types)]
     
-    def _perform_recognition(self, temp_file_path: str) -> Optional[str]:
-        """执行语音识别"""
-        if self.config.engine_type == "whisper":
-            return self._transcribe_with_whisper(temp_file_path)
-        else:
-            return self._transcribe_with_google(temp_file_path)
+    def _transcribe_batch_with_belle(self, audio_items: list, source_types: list) -> list:
+        """一次BELLE管道调用转写多个音频片段"""
+        # 批量输入需各自持有数据，不能共用线程缓冲区视图
+        arrays = [self._pcm_to_model_input(pcm, self._source_channels(source_type)).copy()
+                  for pcm, source_type in zip(audio_items, source_types)]
+        
+        self.log("info", f"开始BELLE模型批量转写，共 {len(arrays)} 个音频片段...")
+        start_time = time.time()
+        results = self._run_belle(arrays)
+        transcribe_time = time.time() - start_time
+        self.log("info", f"BELLE模型批量转写完成，耗时: {transcribe_time:.1f}秒")
+        
+        return [self._format_transcription_text(text) if text and text.strip() else None
+                for text in results]
     
-    def _transcribe_with_whisper(self, temp_file_path: str) -> Optional[str]:
-        """使用Whisper进行转写"""
+    def _run_belle(self, arrays: list) -> list:
+        """用BELLE模型转写多个16kHz float32数组，返回与输入顺序一致的文本列表"""
+        model = self.belle_pipeline.model
+        # GPU上对30秒以内的音频直接提取特征并调用generate，跳过管道的分块处理
+        if model.device.type == "cuda" and all(array.shape[-1] <= self.WINDOW_SAMPLES for array in arrays):
+            return self._generate_with_belle(arrays)
+            
+        inputs = [{"array": array, "sampling_rate": self.MODEL_SAMPLE_RATE} for array in arrays]
+        with torch.inference_mode():
+            results = self.belle_pipeline(
+                inputs,
+                batch_size=len(inputs),
+                generate_kwargs={"language": "chinese", "task": "transcribe"}
+            )
+        return [self._extract_pipeline_text(result) for result in results]
+    
+    def _generate_with_belle(self, arrays: list) -> list:
+        """在GPU上计算梅尔特征后直接调用generate，跳过管道在CPU上的特征提取和分块处理
+        
+        仅适用于不超过一个解码窗口（30秒）的音频。
+        """
+        model = self.belle_pipeline.model
+        features = self.belle_pipeline.feature_extractor(
+            arrays,
+            sampling_rate=self.MODEL_SAMPLE_RATE,
+            return_tensors="pt",
+            device=str(model.device)
+        ).input_features
+        with torch.inference_mode():
+            token_ids = model.generate(
+                input_features=features.to(model.device, dtype=model.dtype),
+                language="chinese",
+                task="transcribe",
+                max_new_tokens=128
+            )
+        return self.belle_pipeline.tokenizer.batch_decode(token_ids, skip_special_tokens=True)
+    
+    @staticmethod
+    def _extract_pipeline_text(result) -> str:
+        """从BELLE管道的返回结果中提取转写文本"""
+        if isinstance(result, dict) and "text" in result:
+            return result["text"]
+        if isinstance(result, list) and len(result) > 0 and "text" in result[0]:
+            return result[0]["text"]
+        return str(result)
+    
+    def _pcm16_to_float32(self, pcm: Union[bytes, np.ndarray]) -> np.ndarray:
+        """将16位PCM数据转换为[-1, 1)范围的float32数组
+        
+        返回值是当前线程复用缓冲区的视图，在该线程下一次转换前有效。
+        """
+        pcm = _as_int16(pcm)
+        scratch = getattr(self._thread_local, 'f32_scratch', None)
+        if scratch is None or scratch.size < pcm.size:
+            scratch = np.empty(pcm.size, dtype=np.float32)
+            self._thread_local.f32_scratch = scratch
+        return np.multiply(pcm, 1.0 / 32768.0, out=scratch[:pcm.size], casting='unsafe')
+    
+    def _source_channels(self, source_type: AudioSource) -> int:
+        """音频源送入转写的PCM声道数：麦克风按配置的声道数采集，系统音频采集时已混为单声道"""
+        return self.config.channels if source_type is AudioSource.MICROPHONE else 1
+    
+    def _pcm_to_model_input(self, pcm: Union[bytes, np.ndarray], channels: int = 1) -> np.ndarray:
+        """将channels声道的PCM数据转换为模型输入的16kHz单声道float32数组，仅在需要时混音和重采样"""
+        audio = self._pcm16_to_float32(pcm)
+        if channels > 1:
+            usable = audio.size - audio.size % channels
+            audio = audio[:usable].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+        rate = self.config.sample_rate
+        if rate != self.MODEL_SAMPLE_RATE:
+            from scipy import signal  # 仅在需要重采样时导入，首次导入后由模块缓存
+            divisor = np.gcd(rate, self.MODEL_SAMPLE_RATE)
+            audio = signal.resample_poly(audio, self.MODEL_SAMPLE_RATE // divisor,
+                                         rate // divisor).astype(np.float32, copy=False)
+        return audio
+    
+    def _transcribe_with_whisper(self, audio) -> Optional[str]:
+        """使用Whisper进行转写，audio可以是音频文件路径或16kHz的float32数组"""
         try:
             if self.belle_pipeline is None and self.whisper_model is None:
                 self.load_whisper_model()
@@ -132,21 +481,20 @@ class AudioTranscriptionEngine:
                 start_time = time.time()
                 
                 # 使用BELLE模型进行转写
-                result = self.belle_pipeline(
-                    temp_file_path,
-                    generate_kwargs={"language": "chinese", "task": "transcribe"}
-                )
+                if isinstance(audio, np.ndarray):
+                    text = self._run_belle([audio])[0]
+                else:
+                    # 推理模式下不记录自动求导信息
+                    with torch.inference_mode():
+                        result = self.belle_pipeline(
+                            audio,
+                            generate_kwargs={"language": "chinese", "task": "transcribe"}
+                        )
+                    # 提取转写文本
+                    text = self._extract_pipeline_text(result)
                 
                 transcribe_time = time.time() - start_time
                 
-                # 提取转写文本
-                if isinstance(result, dict) and "text" in result:
-                    text = result["text"]
-                elif isinstance(result, list) and len(result) > 0 and "text" in result[0]:
-                    text = result[0]["text"]
-                else:
-                    text = str(result)
-                
                 self.log("info", f"BELLE模型转写完成，耗时: {transcribe_time:.1f}秒")
                 return text
                 
@@ -155,17 +503,53 @@ class AudioTranscriptionEngine:
                 self.log("info", "开始原生Whisper转写，使用中文语言...")
                 start_time = time.time()
                 # 使用中文语言，不进行自动检测
-                result = self.whisper_model.transcribe(
-                    temp_file_path, 
-                    language='zh',
-                    initial_prompt="以下是普通话的句子。"
-                )
+                if self.whisper_backend == "faster_whisper":
+                    segments, info = self.whisper_model.transcribe(
+                        audio,
+                        language='zh',
+                        beam_size=1,
+                        vad_filter=True,
+                        vad_parameters=dict(min_silence_duration_ms=500),
+                        initial_prompt="以下是普通话的句子。"
+                    )
+                    # segments是生成器，遍历时才真正执行解码
+                    text = "".join(segment.text for segment in segments)
+                    detected_language = info.language
+                elif isinstance(audio, np.ndarray) and audio.shape[-1] <= self.WINDOW_SAMPLES:
+                    # 30秒以内的片段只需一个解码窗口：直接贪心解码且不生成时间戳
+                    import whisper  # 模型加载时已导入，这里只是取已缓存的模块
+                    with torch.inference_mode():
+                        # 音频先送到模型所在设备，STFT和梅尔滤波在GPU上完成
+                        mel = whisper.log_mel_spectrogram(
+                            whisper.pad_or_trim(audio),
+                            n_mels=self.whisper_model.dims.n_mels,
+                            device=self.whisper_model.device
+                        )
+                        options = whisper.DecodingOptions(
+                            language="zh",
+                            fp16=torch.cuda.is_available(),
+                            without_timestamps=True,
+                            prompt="以下是普通话的句子。"
+                        )
+                        result = whisper.decode(self.whisper_model, mel, options)
+                    text = result.text
+                    detected_language = result.language
+                else:
+                    # GPU上以FP16推理，推理模式下不记录自动求导信息
+                    with torch.inference_mode():
+                        result = self.whisper_model.transcribe(
+                            audio, 
+                            language='zh',
+                            fp16=torch.cuda.is_available(),
+                            initial_prompt="以下是普通话的句子。"
+                        )
+                    text = result["text"]
+                    detected_language = result.get('language', '未知')
                 transcribe_time = time.time() - start_time
                 
-                detected_language = result.get('language', '未知')
                 self.log("info", f"原生Whisper转写完成，耗时: {transcribe_time:.1f}秒, 检测语言: {detected_language}")
                 
-                return result["text"]
+                return text
             else:
                 raise Exception("Whisper模型未加载")
         except Exception as e:
@@ -187,6 +571,11 @@ class AudioTranscriptionEngine:
                 else:
                     self.log("info", "未检测到GPU设备，将使用CPU运行")
                 
+                # 已安装faster-whisper时优先使用BELLE模型的CTranslate2版本，失败时回退到transformers
+                if self.model_type == "belle" and self.config.belle_ct2 and FASTER_WHISPER_AVAILABLE:
+                    if self._load_belle_ct2(device):
+                        return
+                
                 # 优先尝试加载BELLE模型
                 if TRANSFORMERS_AVAILABLE and self.model_type == "belle":
                     try:
@@ -195,20 +584,47 @@ class AudioTranscriptionEngine:
                         start_time = time.time()
                         
                         # 加载BELLE模型
-                        model_id = "BELLE-2/Belle-whisper-large-v3-turbo-zh"
+                        model_id = self.BELLE_MODEL_ID
                         
                         # 设置torch数据类型
                         torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
                         
                         # 加载模型
                         from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-                        model = AutoModelForSpeechSeq2Seq.from_pretrained(
-                            model_id, 
-                            torch_dtype=torch_dtype, 
-                            low_cpu_mem_usage=True, 
-                            use_safetensors=True
-                        )
-                        model.to(device)
+                        
+                        # int8量化：权重以int8存放，计算时反量化为FP16
+                        quantize = device == "cuda" and self.config.quantize_int8 and BITSANDBYTES_AVAILABLE
+                        quant_kwargs = {}
+                        if quantize:
+                            from transformers import BitsAndBytesConfig
+                            quant_kwargs["quantization_config"] = BitsAndBytesConfig(load_in_8bit=True)
+                            self.log("info", "BELLE模型将以int8量化方式加载")
+                        elif self.config.quantize_int8 and device == "cuda":
+                            self.log("warning", "未安装bitsandbytes，BELLE模型不进行int8量化")
+                        
+                        # 注意力实现：GPU上优先FlashAttention-2，不可用时依次回退到SDPA和默认实现
+                        attn_candidates = ["flash_attention_2", "sdpa", None] if device == "cuda" else ["sdpa", None]
+                        for attn_implementation in attn_candidates:
+                            extra_kwargs = dict(quant_kwargs)
+                            if attn_implementation:
+                                extra_kwargs["attn_implementation"] = attn_implementation
+                            try:
+                                model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                                    model_id, 
+                                    torch_dtype=torch_dtype, 
+                                    low_cpu_mem_usage=True, 
+                                    use_safetensors=True,
+                                    **extra_kwargs
+                                )
+                                self.log("info", f"BELLE模型注意力实现: {attn_implementation or '默认'}")
+                                break
+                            except (ImportError, ValueError) as e:
+                                if attn_implementation is None:
+                                    raise
+                                self.log("warning", f"{attn_implementation}不可用，尝试下一种注意力实现: {str(e)}")
+                        # 量化模型加载时已放置到GPU，不能再移动
+                        if not quantize:
+                            model.to(device)
                         
                         # 加载处理器
                         processor = AutoProcessor.from_pretrained(model_id)
@@ -224,9 +640,13 @@ class AudioTranscriptionEngine:
                             batch_size=16,
                             return_timestamps=True,
                             torch_dtype=torch_dtype,
-                            device=device,
+                            **({} if quantize else {"device": device}),
                         )
                         
+                        # GPU上编译模型，降低短音频片段反复解码时的内核启动开销
+                        if device == "cuda":
+                            self._compile_belle_model(model)
+                        
                         load_time = time.time() - start_time
                         self.log("info", f"BELLE-2/Belle-whisper-large-v3-turbo-zh模型加载成功，耗时: {load_time:.1f}秒，设备: {device}")
                         return
@@ -239,54 +659,193 @@ class AudioTranscriptionEngine:
                 # 如果BELLE模型加载失败或不可用，使用原生Whisper模型
                 self.log("info", f"开始加载原生Whisper模型，设备: {device} {gpu_info}")
                 
-                # 优先使用turbo模型（最新最快模型）
-                try:
-                    self.log("info", "尝试加载turbo模型...")
-                    start_time = time.time()
-                    self.whisper_model = whisper.load_model("turbo", device=device)
-                    load_time = time.time() - start_time
-                    self.log("info", f"turbo模型加载成功，耗时: {load_time:.1f}秒，设备: {device}")
-                except Exception as e1:
-                    self.log("warning", f"turbo模型加载失败: {str(e1)}")
-                    # 如果turbo模型失败，尝试small模型
+                # 按turbo（最新最快）→ small → base → tiny 的顺序依次尝试
+                errors = []
+                for tier in ("turbo", "small", "base", "tiny"):
                     try:
-                        self.log("info", "尝试加载small模型...")
+                        self.log("info", f"尝试加载{tier}模型...")
                         start_time = time.time()
-                        self.whisper_model = whisper.load_model("small", device=device)
+                        self.whisper_model, self.whisper_backend = self._load_native_whisper(tier, device)
                         load_time = time.time() - start_time
-                        self.log("info", f"small模型加载成功，耗时: {load_time:.1f}秒，设备: {device}")
-                    except Exception as e2:
-                        self.log("warning", f"small模型加载失败: {str(e2)}")
-                        # 如果small模型失败，尝试base模型
-                        try:
-                            self.log("info", "尝试加载base模型...")
-                            start_time = time.time()
-                            self.whisper_model = whisper.load_model("base", device=device)
-                            load_time = time.time() - start_time
-                            self.log("info", f"base模型加载成功，耗时: {load_time:.1f}秒，设备: {device}")
-                        except Exception as e3:
-                            self.log("warning", f"base模型加载失败: {str(e3)}")
-                            # 最后尝试tiny模型作为备选
-                            try:
-                                self.log("info", "尝试加载tiny模型...")
-                                start_time = time.time()
-                                self.whisper_model = whisper.load_model("tiny", device=device)
-                                load_time = time.time() - start_time
-                                self.log("warning", f"tiny模型加载成功，耗时: {load_time:.1f}秒，设备: {device}（注意：准确率较低）")
-                            except Exception as e4:
-                                error_msg = f"所有模型下载失败。Turbo: {str(e1)}, Small: {str(e2)}, Base: {str(e3)}, Tiny: {str(e4)}"
-                                self.log("error", error_msg)
-                                raise Exception(error_msg)
+                        level = "warning" if tier == "tiny" else "info"
+                        note = "（注意：准确率较低）" if tier == "tiny" else ""
+                        self.log(level, f"{tier}模型加载成功（{self.whisper_backend}），耗时: {load_time:.1f}秒，设备: {device}{note}")
+                        break
+                    except Exception as e:
+                        self.log("warning", f"{tier}模型加载失败: {str(e)}")
+                        errors.append(f"{tier.capitalize()}: {str(e)}")
+                else:
+                    error_msg = f"所有模型下载失败。{', '.join(errors)}"
+                    self.log("error", error_msg)
+                    raise Exception(error_msg)
                         
             except Exception as e:
                 self.log("error", f"Whisper模型加载失败: {str(e)}")
                 raise e  # 重新抛出异常
     
-    def _transcribe_with_google(self, temp_file_path: str) -> Optional[str]:
-        """使用Google进行转写"""
+    def _compile_belle_model(self, model):
+        """使用torch.compile（reduce-overhead，即CUDA Graphs）编译BELLE模型并预热
+        
+        编译或预热失败时恢复为未编译的模型，不影响正常使用。
+        """
+        if not hasattr(torch, "compile"):
+            return
+        eager_forward = model.forward
+        try:
+            self.log("info", "开始编译BELLE模型（torch.compile reduce-overhead）...")
+            start_time = time.time()
+            # 静态KV缓存使每次解码的张量形状固定，才能复用捕获的CUDA Graph
+            model.generation_config.cache_implementation = "static"
+            model.forward = torch.compile(eager_forward, mode="reduce-overhead", fullgraph=False)
+            
+            # 用一段静音预热，触发编译和图捕获，避免首个真实片段承担编译耗时
+            warmup = np.zeros(self.MODEL_SAMPLE_RATE * self.config.buffer_duration, dtype=np.float32)
+            self._run_belle([warmup])
+            compile_time = time.time() - start_time
+            self.log("info", f"BELLE模型编译完成，耗时: {compile_time:.1f}秒")
+        except Exception as e:
+            model.forward = eager_forward
+            model.generation_config.cache_implementation = None
+            self.log("warning", f"BELLE模型编译失败，使用未编译模型: {str(e)}")
+    
+    @staticmethod
+    def _faster_whisper_compute_type(device: str) -> str:
+        """根据设备选择CTranslate2计算类型
+        
+        有Tensor Core的GPU（计算能力7.0及以上）使用int8_float16，更早的GPU使用float16，CPU使用int8。
+        """
+        if device != "cuda":
+            return "int8"
+        major, _ = torch.cuda.get_device_capability(0)
+        return "int8_float16" if major >= 7 else "float16"
+    
+    def _load_belle_ct2(self, device: str) -> bool:
+        """以faster-whisper加载CTranslate2格式的BELLE模型，成功返回True"""
+        try:
+            self.log("info", f"开始加载{self.BELLE_MODEL_ID}模型（CTranslate2），设备: {device}")
+            start_time = time.time()
+            model_dir = self._ensure_ct2_converted(self.BELLE_MODEL_ID)
+            compute_type = self._faster_whisper_compute_type(device)
+            from faster_whisper import WhisperModel  # 首次加载模型时才导入
+            self.whisper_model = WhisperModel(
+                model_dir,
+                device=device,
+                compute_type=compute_type,
+                num_workers=1,
+                cpu_threads=max(1, (os.cpu_count() or 2) // 2)
+            )
+            self.whisper_backend = "faster_whisper"
+            load_time = time.time() - start_time
+            self.log("info", f"{self.BELLE_MODEL_ID}模型（CTranslate2, {compute_type}）加载成功，耗时: {load_time:.1f}秒，设备: {device}")
+            return True
+        except Exception as e:
+            self.whisper_model = None
+            self.log("warning", f"CTranslate2版BELLE模型加载失败，改用transformers: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _ct2_converter_versions() -> dict:
+        """转换器相关包的版本，升级任一包后之前的失败记录不再生效"""
+        versions = {}
+        for package in ("ctranslate2", "transformers"):
+            try:
+                versions[package] = importlib.metadata.version(package)
+            except importlib.metadata.PackageNotFoundError:
+                versions[package] = None
+        return versions
+    
+    def _ensure_ct2_converted(self, model_id: str) -> str:
+        """确保模型已转换为CTranslate2格式，返回转换结果目录；只在缓存不存在时转换一次
+        
+        转换器本身出错时在缓存目录旁留下.failed记录（版本、时间和错误输出），
+        CT2_RETRY_AFTER内且转换器版本未变时不再重复下载和转换；网络等临时故障不留记录。
+        """
+        model_dir = os.path.join(self.CT2_CACHE_DIR, model_id.replace("/", "--"))
+        if os.path.isfile(os.path.join(model_dir, "model.bin")):
+            return model_dir
+        failed_marker = model_dir + ".failed"
+        versions = self._ct2_converter_versions()
+        try:
+            with open(failed_marker, "r", encoding="utf-8") as f:
+                failure = json.load(f)
+            if (failure.get("versions") == versions
+                    and time.time() - failure.get("time", 0) < self.CT2_RETRY_AFTER):
+                raise RuntimeError(f"CTranslate2转换最近失败过，{self.CT2_RETRY_AFTER // 3600}小时内"
+                                   f"或升级ctranslate2/transformers前不再重试: {failure.get('stderr', '')[-200:]}")
+        except (OSError, ValueError):
+            pass  # 没有失败记录或记录无法解析
+            
+        converter = shutil.which("ct2-transformers-converter")
+        if converter is None or not TRANSFORMERS_AVAILABLE:
+            raise RuntimeError("转换需要ctranslate2和transformers，请先安装")
+            
+        self.log("info", f"首次使用，正在将{model_id}转换为CTranslate2格式（仅需一次，耗时较长）...")
+        start_time = time.time()
+        # 先转换到临时目录，完成后再替换，避免中断留下不完整的缓存
+        tmp_dir = model_dir + ".tmp"
+        os.makedirs(self.CT2_CACHE_DIR, exist_ok=True)
         try:
-            with sr.AudioFile(temp_file_path) as source:
-                audio_for_recognition = self.recognizer.record(source)
+            subprocess.run(
+                [converter, "--model", model_id, "--output_dir", tmp_dir,
+                 "--quantization", "int8_float16",
+                 "--copy_files", "tokenizer.json", "preprocessor_config.json",
+                 "--force"],
+                check=True, capture_output=True
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = (e.stderr or b"").decode("utf-8", errors="replace").strip()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.log("error", f"CTranslate2转换失败（退出码 {e.returncode}）: {stderr or '无错误输出'}")
+            if any(marker in stderr for marker in self.CT2_TRANSIENT_ERRORS):
+                raise RuntimeError("CTranslate2转换因网络问题失败，下次加载时重试") from e
+            try:
+                with open(failed_marker, "w", encoding="utf-8") as f:
+                    json.dump({"versions": versions, "time": time.time(), "stderr": stderr}, f, ensure_ascii=False)
+            except OSError:
+                pass  # 记录写入失败时下次仍会重试
+            raise RuntimeError(f"CTranslate2转换失败，错误记录已保存到 {failed_marker}") from e
+        shutil.rmtree(model_dir, ignore_errors=True)
+        os.replace(tmp_dir, model_dir)
+        try:
+            os.remove(failed_marker)
+        except OSError:
+            pass
+        convert_time = time.time() - start_time
+        self.log("info", f"CTranslate2转换完成，耗时: {convert_time:.1f}秒，缓存目录: {model_dir}")
+        return model_dir
+    
+    def _load_native_whisper(self, tier: str, device: str):
+        """加载指定档位的原生Whisper模型，优先使用faster-whisper（CTranslate2量化推理）
+        
+        返回 (模型, 后端名称)。
+        """
+        if FASTER_WHISPER_AVAILABLE:
+            compute_type = self._faster_whisper_compute_type(device)
+            try:
+                from faster_whisper import WhisperModel  # 首次加载模型时才导入
+                model = WhisperModel(
+                    self.FASTER_WHISPER_MODELS[tier],
+                    device=device,
+                    compute_type=compute_type,
+                    num_workers=1,
+                    cpu_threads=max(1, (os.cpu_count() or 2) // 2)
+                )
+                self.log("info", f"faster-whisper计算类型: {compute_type}")
+                return model, "faster_whisper"
+            except Exception as e:
+                self.log("warning", f"faster-whisper加载{tier}模型失败，改用openai-whisper: {str(e)}")
+        # openai-whisper只在回退到原生模型时才导入，避免拖慢程序启动
+        import whisper
+        return whisper.load_model(tier, device=device), "whisper"
+    
+    def _transcribe_with_google(self, pcm: Union[bytes, np.ndarray]) -> Optional[str]:
+        """使用Google进行转写，直接包装内存中的PCM数据"""
+        try:
+            audio_for_recognition = sr.AudioData(
+                pcm.tobytes() if isinstance(pcm, np.ndarray) else pcm,
+                self.config.sample_rate,
+                self._sample_width
+            )
                 
             try:
                 return self.recognizer.recognize_google(
@@ -304,17 +863,13 @@ class AudioTranscriptionEngine:
     
     def _format_transcription_text(self, text: str) -> str:
         """格式化转写文本"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        sentences = text.replace('。', '。\n').replace('！', '！\n').replace('？', '？\n')
+        now = int(time.time())
+        cached_second, timestamp = self._timestamp_cache
+        if now != cached_second:
+            timestamp = time.strftime("%H:%M:%S", time.localtime(now))
+            self._timestamp_cache = (now, timestamp)
+        sentences = text.translate(_SENTENCE_END_TABLE)
         return f"[{timestamp}] {sentences}\n"
-    
-    def _cleanup_temp_file(self, temp_file_path: str):
-        """清理临时文件"""
-        try:
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-        except Exception as e:
-            self.log("warning", f"清理临时文件失败: {str(e)}")
 
 
 class TranscriptionWorker:
@@ -331,6 +886,7 @@ class TranscriptionWorker:
         self.running = False
         self.thread = None
         self.transcription_count = 0
+        self.silent_count = 0
         
     def start(self):
         """启动转写线程"""
@@ -339,45 +895,134 @@ class TranscriptionWorker:
             
         self.running = True
         self.transcription_count = 0
+        self.silent_count = 0
         self.thread = threading.Thread(target=self._transcription_loop, daemon=True)
         self.thread.start()
         
         self.status_callback(f"{self.source_type.value}转写: 运行中")
         self.engine.log("info", f"{self.source_type.value}转写线程启动")
         
-    def stop(self):
-        """停止转写线程"""
+    def request_stop(self):
+        """通知转写线程停止，不等待线程结束"""
         self.running = False
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=1)
+        # 放入停止标记，立即唤醒阻塞在队列上的线程
+        self.queue.put(None)
+        
+    def stop(self, timeout: float = 1.0):
+        """停止转写线程，最多等待timeout秒"""
+        self.request_stop()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=max(0.0, timeout))
             
         self.status_callback(f"{self.source_type.value}转写: 已停止")
-        self.engine.log("info", f"{self.source_type.value}转写线程结束，共处理 {self.transcription_count} 个音频片段")
+        self.engine.log("info", f"{self.source_type.value}转写线程结束，共处理 {self.transcription_count} 个音频片段，"
+                                f"跳过静音片段 {self.silent_count} 个")
+        
+    def _next_batch(self) -> list:
+        """阻塞取出一个音频片段，再顺带取出队列中已积压的片段组成一批"""
+        audio_data = self.queue.get(timeout=0.5)
+        if audio_data is None:
+            self.running = False
+            return []
+            
+        batch = [audio_data]
+        max_batch_size = self.engine.config.max_batch_size
+        while len(batch) < max_batch_size:
+            try:
+                audio_data = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if audio_data is None:
+                # 收到停止标记，处理完已取出的片段后退出
+                self.running = False
+                break
+            batch.append(audio_data)
+        return batch
+        
+    def _merge_segments(self, segments: list) -> list:
+        """按顺序拼接相邻片段，每段不超过max_merge_seconds，减少模型调用次数"""
+        if len(segments) < 2:
+            return segments
+        config = self.engine.config
+        max_samples = config.max_merge_seconds * config.sample_rate
+        merged, group, group_len = [], [], 0
+        for pcm in segments:
+            if group and group_len + len(pcm) > max_samples:
+                merged.append(group[0] if len(group) == 1 else np.concatenate(group))
+                group, group_len = [], 0
+            group.append(pcm)
+            group_len += len(pcm)
+        merged.append(group[0] if len(group) == 1 else np.concatenate(group))
+        return merged
+        
+    def _wait_results(self, futures: list):
+        """依次等待推理线程返回的结果；超时或失败的片段记录日志后按无结果处理"""
+        timeout = self.engine.config.inference_timeout
+        for future in futures:
+            try:
+                yield future.result(timeout=timeout)
+            except FutureTimeoutError:
+                self.engine.log("warning", f"{self.source_type.value}转写超时（{timeout:.0f}秒），丢弃该片段结果")
+                yield None
+            except Exception as e:
+                self.engine.log("error", f"{self.source_type.value}转写失败: {str(e)}")
+                yield None
         
     def _transcription_loop(self):
         """转写循环"""
+        # 循环内不变的属性提前绑定为局部变量；引擎类型等配置仍由引擎每次读取，支持中途切换
+        next_batch = self._next_batch
+        submit = self.engine.submit
+        transcribe_audio_data = self.engine.transcribe_audio_data
+        supports_batch_inference = self.engine.supports_batch_inference
+        merge_segments = self._merge_segments
+        ui_callback = self.ui_callback
+        status_callback = self.status_callback
+        log = self.engine.log
+        config = self.engine.config
+        source_type = self.source_type
+        source_name = source_type.value
+        
         while self.running:
             try:
-                if not self.queue.empty():
-                    audio_data = self.queue.get(timeout=1)
-                    self.transcription_count += 1
+                # 阻塞等待新的音频片段，数据到达时立即唤醒；超时仅用于检查运行标志
+                batch = next_batch()
+                if not batch:
+                    break
+                    
+                # 静音片段直接丢弃，不占用模型
+                voiced = []
+                for pcm in batch:
+                    if _pcm16_rms(pcm) < config.silence_rms_threshold:
+                        self.silent_count += 1
+                        continue
+                    voiced.append(pcm)
+                if len(voiced) < len(batch):
+                    status_callback(f"{source_name}转写: 运行中（已跳过静音 {self.silent_count} 段）")
                     
-                    # 错误日志频率控制
-                    should_log_error = (self.transcription_count % self.engine.config.error_log_interval == 1)
+                # 模型只能逐段转写时，积压的片段拼接后一次调用，分摊每次调用的固定开销
+                if not supports_batch_inference():
+                    voiced = merge_segments(voiced)
                     
-                    text = self.engine.transcribe_audio_data(audio_data, self.source_type)
+                if config.engine_type == "whisper":
+                    # 本地模型只有一份：交给引擎的推理线程，与另一音频源的片段合批推理
+                    texts = self._wait_results([submit(pcm, source_type) for pcm in voiced])
+                else:
+                    # Google转写受网络延迟限制，各音频源在各自的线程中并发请求
+                    texts = (transcribe_audio_data(pcm, source_type) for pcm in voiced)
+                    
+                for text in texts:
+                    self.transcription_count += 1
                     if text:
-                        self.ui_callback(text)
-                        self.engine.log("info", 
-                            f"{self.source_type.value}转写成功 #{self.transcription_count}: "
+                        ui_callback(text)
+                        log("info", 
+                            f"{source_name}转写成功 #{self.transcription_count}: "
                             f"{text[:50]}{'...' if len(text) > 50 else ''}")
-                else:
-                    time.sleep(0.1)
                     
             except queue.Empty:
                 continue
             except Exception as e:
-                self.engine.log("error", f"{self.source_type.value}转写线程异常: {str(e)}")
+                log("error", f"{source_name}转写线程异常: {str(e)}")
                 continue
 
 
@@ -435,22 +1080,32 @@ class LoggerMixin:
         queue_handler.setFormatter(formatter)
         root_logger.addHandler(queue_handler)
         
+        # 按级别名缓存日志方法，避免每次调用都查找
+        self._logger = logging.getLogger(__name__)
+        self._log_funcs = {
+            "debug": self._logger.debug,
+            "info": self._logger.info,
+            "warning": self._logger.warning,
+            "error": self._logger.error,
+        }
+        
     def log(self, level: str, message: str):
         """统一日志方法"""
-        getattr(logging, level)(message)
+        self._log_funcs[level](message)
         
     def start_log_updater(self):
         """启动日志更新线程"""
         def update_log():
             while True:
                 try:
-                    if hasattr(self, 'log_queue') and not self.log_queue.empty():
-                        log_record = self.log_queue.get(timeout=0.1)
-                        if hasattr(self, 'root'):
-                            self.root.after(0, lambda record=log_record: self.append_log(record))
-                    time.sleep(0.1)
-                except queue.Empty:
-                    continue
+                    # 阻塞等待日志记录，再取出已积压的全部记录，合并为一次界面更新
+                    records = [self.log_queue.get()]
+                    while True:
+                        try:
+                            records.append(self.log_queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    self.root.after(0, self.append_log_batch, records)
                 except Exception as e:
                     print(f"日志更新错误: {e}")
                     
@@ -461,6 +1116,15 @@ class LoggerMixin:
 class AudioTranscriber(LoggerMixin):
     """重构后的音频转写器主类"""
     
+    # 停止录音时等待录音线程和转写线程结束的总时长（秒）
+    STOP_JOIN_TIMEOUT = 1.0
+    
+    # 音频流：(显示名称, 属性名)
+    AUDIO_STREAMS = (("麦克风流", "microphone_stream"), ("系统音频流", "system_audio_stream"))
+    
+    # 界面刷新周期（毫秒），约30帧每秒
+    UI_PUMP_INTERVAL_MS = 33
+    
     def __init__(self, root):
         self.root = root
         self.root.title("录音转写工具")
@@ -472,21 +1136,33 @@ class AudioTranscriber(LoggerMixin):
         
         # 录音状态
         self.recording = False
-        self.start_time = None
+        self.start_time = None  # time.monotonic()时间点，不受系统时钟调整影响
+        self._last_shown_sec = -1  # 时长标签当前显示的秒数
+        self.record_thread = None
         
         # 音频相关
+        self._process = psutil.Process()  # 缓存进程句柄，用于内存统计
         self.audio = pyaudio.PyAudio()
-        self.microphone_frames = []
-        self.system_audio_frames = []
+        self._sample_size = _FMT_WIDTH[self.config.format]  # 会话内恒定，查表代替调用PortAudio
+        # 整段录音的PCM数据，各自连续存放，保存时无需拼接
+        self.microphone_frames = bytearray()
+        self.system_audio_frames = bytearray()
+        # 系统音频混为单声道时复用的缓冲区，按每次回调的帧数预分配
+        self._mono_scratch = np.empty(self.config.frames_per_buffer, dtype=np.int16)
+        self._mix_scratch = np.empty(self.config.frames_per_buffer, dtype=np.int32)
         
         # 音频流
         self.microphone_stream = None
         self.system_audio_stream = None
         
+        # 后台I/O线程池：保存录音、内存清理等阻塞操作不在界面线程执行
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="audio-io")
+        
         # 设备相关
         self.audio_devices = []
         self.microphone_device_index = None
         self.system_audio_device_index = None
+        self.system_audio_device: Optional[DeviceSpec] = None
         self.microphone_enabled = True
         self.system_audio_enabled = True
         
@@ -506,13 +1182,19 @@ class AudioTranscriber(LoggerMixin):
         self.microphone_transcription_queue = queue.Queue()
         self.system_audio_transcription_queue = queue.Queue()
         
-        # 缓冲区
-        self.microphone_buffer = []
-        self.system_audio_buffer = []
+        # 转写缓冲区：按片段送入转写队列；录音开始时按实际采样率分配
+        self.microphone_buffer = PcmSegmentBuffer(self._segment_capacity(self.config.sample_rate, self.config.channels))
+        self.system_audio_buffer = PcmSegmentBuffer(self._segment_capacity(self.config.sample_rate, 1))
+        
+        # 待执行的界面更新：(音频源或状态标签, 文本)，由工作线程追加，界面线程定时统一处理
+        self._ui_queue = deque()
+        self._enabled_save_buttons = set()  # 已启用的保存按钮，避免每次追加文本都重新设置
         
         # 文件管理
         self.current_audio_file = None
         self.current_audio_files = []
+        self._history_cache = []  # 历史文件列表缓存：(文件名, 路径)，与列表框行号一一对应
+        os.makedirs(AUDIO_DIR, exist_ok=True)
         
         # 初始化组件
         self.setup_logging()
@@ -534,6 +1216,9 @@ class AudioTranscriber(LoggerMixin):
         # 确保引擎配置正确同步
         self.on_engine_change()
         
+        # 启动界面更新定时器
+        self.root.after(self.UI_PUMP_INTERVAL_MS, self._ui_pump)
+        
     def setup_ui(self):
         """设置用户界面"""
         # 主框架
@@ -604,7 +1289,8 @@ class AudioTranscriber(LoggerMixin):
         self.status_label = ttk.Label(status_frame, text="准备就绪", font=("Arial", 9))
         self.status_label.grid(row=0, column=0, sticky=tk.W)
         
-        self.duration_label = ttk.Label(status_frame, text="时长: 00:00", font=("Arial", 9))
+        self._duration_var = tk.StringVar(value="时长: 00:00")
+        self.duration_label = ttk.Label(status_frame, textvariable=self._duration_var, font=("Arial", 9))
         self.duration_label.grid(row=0, column=2, sticky=tk.E)
         
     def _setup_file_frame(self, parent):
@@ -762,11 +1448,14 @@ class AudioTranscriber(LoggerMixin):
         """开始录音"""
         try:
             self.recording = True
-            self.start_time = time.time()
+            self.start_time = time.monotonic()
+            self._last_shown_sec = -1
             
             # 清空缓冲区
             self.microphone_frames.clear()
             self.system_audio_frames.clear()
+            self.microphone_buffer.clear()
+            self.system_audio_buffer.clear()
             
             # 启动录音线程
             self.record_thread = threading.Thread(target=self.record_audio, daemon=True)
@@ -777,24 +1466,12 @@ class AudioTranscriber(LoggerMixin):
                 self.real_time_transcription = True
                 
                 if self.microphone_enabled:
-                    self.microphone_worker = TranscriptionWorker(
-                        AudioSource.MICROPHONE,
-                        self.microphone_transcription_queue,
-                        self.transcription_engine,
-                        lambda text: self.root.after(0, lambda: self.append_mic_text(text)),
-                        lambda status: self.root.after(0, lambda: self.mic_status.config(text=status))
-                    )
-                    self.microphone_worker.start()
+                    self.microphone_worker = self._start_worker(
+                        AudioSource.MICROPHONE, self.microphone_transcription_queue, self.mic_status)
                     
                 if self.system_audio_enabled:
-                    self.system_audio_worker = TranscriptionWorker(
-                        AudioSource.SYSTEM_AUDIO,
-                        self.system_audio_transcription_queue,
-                        self.transcription_engine,
-                        lambda text: self.root.after(0, lambda: self.append_sys_text(text)),
-                        lambda status: self.root.after(0, lambda: self.sys_status.config(text=status))
-                    )
-                    self.system_audio_worker.start()
+                    self.system_audio_worker = self._start_worker(
+                        AudioSource.SYSTEM_AUDIO, self.system_audio_transcription_queue, self.sys_status)
             
             # 更新UI
             self.record_button.config(text="停止录音")
@@ -815,25 +1492,26 @@ class AudioTranscriber(LoggerMixin):
             self.recording = False
             self.real_time_transcription = False
             
-            # 停止转写工作器
-            if self.microphone_worker:
-                self.microphone_worker.stop()
-                self.microphone_worker = None
+            # 先通知所有转写工作器停止，使各线程同时退出
+            workers = [w for w in (self.microphone_worker, self.system_audio_worker) if w is not None]
+            for worker in workers:
+                worker.request_stop()
                 
-            if self.system_audio_worker:
-                self.system_audio_worker.stop()
-                self.system_audio_worker = None
+            # 所有线程共用同一个截止时间，总等待时间不超过STOP_JOIN_TIMEOUT
+            deadline = time.monotonic() + self.STOP_JOIN_TIMEOUT
+            if self.record_thread is not None and self.record_thread.is_alive():
+                self.record_thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            for worker in workers:
+                worker.stop(timeout=deadline - time.monotonic())
+            self.microphone_worker = None
+            self.system_audio_worker = None
+                
+            # 丢弃尚未转写的音频片段，避免带入下一次录音
+            _drain_queue(self.microphone_transcription_queue)
+            _drain_queue(self.system_audio_transcription_queue)
             
             # 停止音频流
-            if self.microphone_stream:
-                self.microphone_stream.stop_stream()
-                self.microphone_stream.close()
-                self.microphone_stream = None
-                
-            if self.system_audio_stream:
-                self.system_audio_stream.stop_stream()
-                self.system_audio_stream.close()
-                self.system_audio_stream = None
+            self._close_audio_streams()
             
             # 更新UI
             self.record_button.config(text="开始录音")
@@ -845,9 +1523,34 @@ class AudioTranscriber(LoggerMixin):
             
             self.log("info", "录音已停止")
             
+            # 垃圾回收和内存统计放到后台线程，不阻塞界面恢复
+            self._io_pool.submit(self._deferred_cleanup)
+            
         except Exception as e:
             self.log("error", f"停止录音失败: {str(e)}")
         
+    def _close_audio_streams(self):
+        """关闭所有音频流，单个流关闭失败不影响其他流"""
+        for name, attr in self.AUDIO_STREAMS:
+            stream = getattr(self, attr, None)
+            if stream is None:
+                continue
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception as e:
+                self.log("warning", f"关闭{name}失败: {str(e)}")
+            setattr(self, attr, None)
+            
+    def _deferred_cleanup(self):
+        """录音结束后的后台清理：回收内存并记录当前内存占用"""
+        try:
+            gc.collect()
+            memory_mb = self._process.memory_info().rss / 1024 / 1024
+            self.log("info", f"当前内存使用: {memory_mb:.1f}MB")
+        except Exception as e:
+            self.log("warning", f"内存清理失败: {str(e)}")
+            
     def on_engine_change(self, event=None):
         """引擎变更处理"""
         self.engine_type = self.engine_var.get()
@@ -865,18 +1568,19 @@ class AudioTranscriber(LoggerMixin):
         self.engine_combo.config(state="disabled")
         self.record_button.config(state="disabled")
         self.transcribe_button.config(state="disabled")
+        self.record_button.config(text="模型加载中...")
         self.status_label.config(text="正在加载Whisper模型...")
         self.status_bar.config(text="正在加载模型，请稍候...")
         
-        # 在后台线程中加载模型
+        # 在后台线程中加载并预热模型
         def load_model_thread():
             try:
-                self.transcription_engine.load_whisper_model()
+                self.transcription_engine.prewarm()
                 # 加载完成后更新UI
                 self.root.after(0, self._on_model_loaded_success)
             except Exception as e:
                 # 加载失败后更新UI
-                self.root.after(0, lambda: self._on_model_loaded_error(str(e)))
+                self.root.after(0, self._on_model_loaded_error, str(e))
         
         threading.Thread(target=load_model_thread, daemon=True).start()
     
@@ -884,7 +1588,7 @@ class AudioTranscriber(LoggerMixin):
         """模型加载成功的UI更新"""
         self.progress.stop()
         self.engine_combo.config(state="readonly")
-        self.record_button.config(state="normal")
+        self.record_button.config(state="normal", text="开始录音")
         self.transcribe_button.config(state="normal" if hasattr(self, 'audio_file_path') and self.audio_file_path else "disabled")
         self.status_label.config(text=f"已切换到{self.engine_type}引擎")
         self.status_bar.config(text="Whisper模型加载完成")
@@ -893,7 +1597,7 @@ class AudioTranscriber(LoggerMixin):
         """模型加载失败的UI更新"""
         self.progress.stop()
         self.engine_combo.config(state="readonly")
-        self.record_button.config(state="normal")
+        self.record_button.config(state="normal", text="开始录音")
         self.transcribe_button.config(state="normal" if hasattr(self, 'audio_file_path') and self.audio_file_path else "disabled")
         self.status_label.config(text="模型加载失败，已回退到Google引擎")
         self.status_bar.config(text="模型加载失败")
@@ -904,34 +1608,66 @@ class AudioTranscriber(LoggerMixin):
         messagebox.showerror("错误", f"加载Whisper模型失败: {error_msg}\n\n建议：\n1. 检查网络连接\n2. 确保有足够的磁盘空间\n3. 安装transformers库: pip install transformers\n4. 尝试重新启动程序")
         
     def toggle_microphone(self):
-        """切换麦克风状态"""
+        """切换麦克风开关"""
         self.microphone_enabled = self.microphone_var.get()
+        status = "启用" if self.microphone_enabled else "禁用"
+        self.log("info", f"麦克风已{status}")
         
     def toggle_system_audio(self):
-        """切换系统音频状态"""
+        """切换系统音频开关"""
         self.system_audio_enabled = self.system_audio_var.get()
+        status = "启用" if self.system_audio_enabled else "禁用"
+        self.log("info", f"系统音频已{status}")
         
-    def append_mic_text(self, text: str):
-        """添加麦克风转写文本"""
-        self.mic_text_area.config(state=tk.NORMAL)
-        self.mic_text_area.insert(tk.END, text)
-        self.mic_text_area.see(tk.END)
-        self.mic_text_area.config(state=tk.DISABLED)
-        
-    def append_sys_text(self, text: str):
-        """添加系统音频转写文本"""
-        self.sys_text_area.config(state=tk.NORMAL)
-        self.sys_text_area.insert(tk.END, text)
-        self.sys_text_area.see(tk.END)
-        self.sys_text_area.config(state=tk.DISABLED)
+    def _start_worker(self, source: AudioSource, transcription_queue: queue.Queue,
+                      status_label: ttk.Label) -> TranscriptionWorker:
+        """创建并启动指定音频源的转写工作器"""
+        worker = TranscriptionWorker(
+            source,
+            transcription_queue,
+            self.transcription_engine,
+            lambda text: self._ui_queue.append((source, text)),
+            lambda status: self._ui_queue.append((status_label, status))
+        )
+        worker.start()
+        return worker
+        
+    def _ui_pump(self):
+        """界面线程定时取出所有待执行的更新：每个文本框只插入一次，状态标签只显示最新状态"""
+        texts = {}
+        statuses = {}
+        ui_queue = self._ui_queue
+        while ui_queue:
+            target, text = ui_queue.popleft()
+            if isinstance(target, AudioSource):
+                texts.setdefault(target, []).append(text)
+            else:
+                statuses[target] = text
+                
+        try:
+            for label, status in statuses.items():
+                label.config(text=status)
+            if AudioSource.MICROPHONE in texts:
+                self.append_mic_text("\n".join(texts[AudioSource.MICROPHONE]))
+            if AudioSource.SYSTEM_AUDIO in texts:
+                self.append_sys_text("\n".join(texts[AudioSource.SYSTEM_AUDIO]))
+        except Exception as e:
+            self.log("warning", f"界面更新失败: {str(e)}")
+        finally:
+            self.root.after(self.UI_PUMP_INTERVAL_MS, self._ui_pump)
         
     def append_log(self, log_record):
         """添加日志"""
+        self.append_log_batch([log_record])
+        
+    def append_log_batch(self, log_records):
+        """一次性添加多条日志"""
         try:
             if hasattr(self, 'log_area'):
                 self.log_area.config(state=tk.NORMAL)
                 timestamp = datetime.now().strftime("%H:%M:%S")
-                log_text = f"[{timestamp}] {log_record.levelname}: {log_record.getMessage()}\n"
+                log_text = "".join(f"[{timestamp}] {record.levelname}: {record.getMessage()}\n"
+                                   for record in log_records)
                 self.log_area.insert(tk.END, log_text)
                 
                 if self.auto_scroll_var.get():
@@ -948,7 +1684,9 @@ class AudioTranscriber(LoggerMixin):
         self.log_area.config(state=tk.DISABLED)
         
     def record_audio(self):
-        """录音线程函数"""
+        """录音线程函数：音频流以回调方式采集，本线程处理回调送来的数据"""
+        # PortAudio回调线程只负责把数据放入队列，其余处理都在本线程完成
+        captured = queue.SimpleQueue()
         try:
             # 初始化音频流
             if self.microphone_enabled and self.microphone_device_index is not None:
@@ -958,61 +1696,101 @@ class AudioTranscriber(LoggerMixin):
                     rate=self.config.sample_rate,
                     input=True,
                     input_device_index=self.microphone_device_index,
-                    frames_per_buffer=self.config.chunk_size
+                    frames_per_buffer=self.config.frames_per_buffer,
+                    stream_callback=self._make_stream_callback(captured, AudioSource.MICROPHONE)
                 )
                 
-            if self.system_audio_enabled and self.system_audio_device_index is not None:
-                device_info = self.audio.get_device_info_by_index(self.system_audio_device_index)
+            sys_channels = 1
+            if self.system_audio_enabled and self.system_audio_device is not None:
+                # 使用扫描设备时缓存的声道数和采样率，无需再查询PortAudio
+                sys_channels = self.system_audio_device.channels
+                # 系统音频按设备采样率采集，混为单声道后写入转写缓冲区
+                self.system_audio_buffer = PcmSegmentBuffer(
+                    self._segment_capacity(self.system_audio_device.rate, 1))
                 self.system_audio_stream = self.audio.open(
                     format=self.config.format,
-                    channels=int(device_info['maxInputChannels']),
-                    rate=int(device_info['defaultSampleRate']),
+                    channels=sys_channels,
+                    rate=self.system_audio_device.rate,
                     input=True,
                     input_device_index=self.system_audio_device_index,
-                    frames_per_buffer=self.config.chunk_size
+                    frames_per_buffer=self.config.frames_per_buffer,
+                    stream_callback=self._make_stream_callback(captured, AudioSource.SYSTEM_AUDIO)
                 )
             
-            buffer_count = 0
+            # 按固定时长切分转写片段
+            segment_deadline = time.monotonic() + self.config.buffer_duration
             while self.recording:
-                # 录制麦克风音频
-                if self.microphone_stream:
-                    try:
-                        mic_data = self.microphone_stream.read(self.config.chunk_size, exception_on_overflow=False)
-                        self.microphone_frames.append(mic_data)
-                        self.microphone_buffer.append(mic_data)
-                    except Exception as e:
-                        self.log("warning", f"麦克风录音错误: {str(e)}")
-                
-                # 录制系统音频
-                if self.system_audio_stream:
-                    try:
-                        sys_data = self.system_audio_stream.read(self.config.chunk_size, exception_on_overflow=False)
-                        # 处理多声道数据
-                        device_info = self.audio.get_device_info_by_index(self.system_audio_device_index)
-                        processed_data = self.analyze_channel_data(sys_data, int(device_info['maxInputChannels']))
-                        self.system_audio_frames.append(processed_data)
-                        self.system_audio_buffer.append(processed_data)
-                    except Exception as e:
-                        self.log("warning", f"系统音频录音错误: {str(e)}")
+                try:
+                    source, data = captured.get(timeout=0.1)
+                    self._store_captured_audio(source, data, sys_channels)
+                except queue.Empty:
+                    pass
                 
                 # 实时转写处理
-                if self.real_time_transcription:
-                    buffer_count += 1
-                    if buffer_count >= self.config.sample_rate // self.config.chunk_size * self.config.buffer_duration:
-                        # 发送音频数据到转写队列
-                        if self.microphone_buffer and self.microphone_enabled:
-                            self.microphone_transcription_queue.put(self.microphone_buffer.copy())
-                            self.microphone_buffer.clear()
-                            
-                        if self.system_audio_buffer and self.system_audio_enabled:
-                            self.system_audio_transcription_queue.put(self.system_audio_buffer.copy())
-                            self.system_audio_buffer.clear()
-                            
-                        buffer_count = 0
+                if self.real_time_transcription and time.monotonic() >= segment_deadline:
+                    self._flush_transcription_buffers()
+                    segment_deadline = time.monotonic() + self.config.buffer_duration
+                    
+            # 保存停止前已采集但尚未处理的数据
+            while True:
+                try:
+                    source, data = captured.get_nowait()
+                except queue.Empty:
+                    break
+                self._store_captured_audio(source, data, sys_channels)
                         
         except Exception as e:
             self.log("error", f"录音线程错误: {str(e)}")
             
+    @staticmethod
+    def _make_stream_callback(captured: queue.SimpleQueue, source: AudioSource):
+        """创建PortAudio输入回调：将音频数据连同来源放入队列后立即返回"""
+        def callback(in_data, frame_count, time_info, status):
+            captured.put((source, in_data))
+            return (None, pyaudio.paContinue)
+        return callback
+        
+    def _segment_capacity(self, sample_rate: int, channels: int) -> int:
+        """转写缓冲区容量（样本数）：两个片段时长，片段切分稍有延迟也不会写满"""
+        return sample_rate * channels * self.config.buffer_duration * 2
+            
+    def _store_captured_audio(self, source: AudioSource, data: bytes, sys_channels: int):
+        """保存一块采集到的音频，系统音频先混为单声道"""
+        if source is AudioSource.MICROPHONE:
+            self.microphone_frames += data
+            buffer, enabled = self.microphone_buffer, self.microphone_enabled
+        else:
+            data = self.analyze_channel_data(data, sys_channels)
+            self.system_audio_frames += data
+            buffer, enabled = self.system_audio_buffer, self.system_audio_enabled
+            
+        # 未开启实时转写时不需要转写缓冲区
+        if not self.real_time_transcription:
+            return
+        if not enabled:
+            # 录音中途取消勾选的音频源不再转写；丢弃已缓冲的数据，重新勾选后从新的片段开始
+            buffer.clear()
+            return
+        if not buffer.write(data):
+            # 缓冲区已满：只提前切出本音频源的当前片段，再写入本块数据
+            self._flush_transcription_buffer(source)
+            if not buffer.write(data):
+                self.log("warning", f"{source.value}数据块超过转写缓冲区容量，已丢弃")
+            
+    def _flush_transcription_buffer(self, source: AudioSource):
+        """将一个音频源转写缓冲区中的音频作为一个片段送入转写队列"""
+        # 取出的是连续的int16数组，转写端直接使用，无需再拷贝
+        if source is AudioSource.MICROPHONE:
+            if self.microphone_buffer and self.microphone_enabled:
+                self.microphone_transcription_queue.put(self.microphone_buffer.take())
+        elif self.system_audio_buffer and self.system_audio_enabled:
+            self.system_audio_transcription_queue.put(self.system_audio_buffer.take())
+            
+    def _flush_transcription_buffers(self):
+        """到达片段时长时，切出所有音频源的当前片段"""
+        self._flush_transcription_buffer(AudioSource.MICROPHONE)
+        self._flush_transcription_buffer(AudioSource.SYSTEM_AUDIO)
+            
     def analyze_channel_data(self, data, channels):
         """分析和处理多声道音频数据"""
         try:
@@ -1031,16 +1809,30 @@ class AudioTranscriber(LoggerMixin):
                 padding_needed = channels - (len(audio_array) % channels)
                 audio_array = np.pad(audio_array, (0, padding_needed), mode='constant')
                 
-            reshaped = audio_array.reshape(-1, channels)
-            
-            # 混合到单声道
+            # 结果写入复用的缓冲区，仅在数据块超过预分配大小时重新分配
+            frame_count = len(audio_array) // channels
+            if frame_count > len(self._mono_scratch):
+                self._mono_scratch = np.empty(frame_count, dtype=np.int16)
+                self._mix_scratch = np.empty(frame_count, dtype=np.int32)
+            mono_audio = self._mono_scratch[:frame_count]
+            mix = self._mix_scratch[:frame_count]
+                
+            # 混合到单声道：先扩展为int32再求和，避免int16累加溢出
             if channels == 2:
-                # 立体声处理
-                mono_audio = np.mean(reshaped, axis=1, dtype=np.int16)
+                # 立体声处理：左右声道相加后右移一位
+                np.add(audio_array[0::2], audio_array[1::2], out=mix, dtype=np.int32)
+                np.right_shift(mix, 1, out=mono_audio, casting='unsafe')
             else:
-                # 多声道处理
-                mono_audio = np.mean(reshaped, axis=1, dtype=np.int16)
+                kernel = _mix_kernel()
+                if kernel is not None:
+                    # 多声道处理：编译后的内核一次遍历完成混音，不产生中间数组
+                    kernel(audio_array, channels, mono_audio)
+                else:
+                    # 多声道处理
+                    np.add.reduce(audio_array.reshape(-1, channels), axis=1, dtype=np.int32, out=mix)
+                    np.floor_divide(mix, channels, out=mono_audio, casting='unsafe')
                 
+            # 返回独立的bytes：调用方会保留该数据，不能引用复用的缓冲区
             return mono_audio.tobytes()
             
         except Exception as e:
@@ -1048,53 +1840,96 @@ class AudioTranscriber(LoggerMixin):
             return b'\x00\x00' * (len(data) // (channels * 2))
             
     def _save_recording_files(self):
-        """保存录音文件 - 独立保存麦克风和系统音频"""
+        """保存录音文件 - 独立保存麦克风和系统音频，写盘在后台线程池中进行"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_dir = "audio"
+            audio_dir = AUDIO_DIR
             os.makedirs(audio_dir, exist_ok=True)
             
-            saved_files = []
-            
-            # 保存麦克风音频
+            # 待保存的音频：(名称, 文件路径, 音频帧, 采样率, 声道数)
+            # 录音数据整体移交给写盘任务，并换上新的缓冲区，下一次录音不会影响尚未写完的数据
+            jobs = []
             if self.microphone_frames:
-                mic_file = os.path.join(audio_dir, f"microphone_{timestamp}.wav")
-                self._save_wav_file(mic_file, self.microphone_frames, self.config.sample_rate, self.config.channels)
-                saved_files.append(mic_file)
-                self.log("info", f"麦克风音频已保存: {mic_file}")
-                
-            # 保存系统音频
+                jobs.append(("麦克风音频", os.path.join(audio_dir, f"microphone_{timestamp}.wav"),
+                             self.microphone_frames, self.config.sample_rate, self.config.channels))
+                self.microphone_frames = bytearray()
             if self.system_audio_frames:
-                sys_file = os.path.join(audio_dir, f"system_audio_{timestamp}.wav")
-                self._save_wav_file(sys_file, self.system_audio_frames, self.config.sample_rate, 1)
-                saved_files.append(sys_file)
-                self.log("info", f"系统音频已保存: {sys_file}")
+                jobs.append(("系统音频", os.path.join(audio_dir, f"system_audio_{timestamp}.wav"),
+                             self.system_audio_frames, self.config.sample_rate, 1))
+                self.system_audio_frames = bytearray()
                 
-            # 不再合并音频文件，保持独立
-            self.current_audio_files = saved_files
-            self.refresh_history_files()
+            # 不再合并音频文件，保持独立；各文件写完后再加入列表
+            self.current_audio_files = []
+            for name, path, frames, rate, channels in jobs:
+                future = self._io_pool.submit(self._save_wav_file, path, frames, rate, channels)
+                future.add_done_callback(
+                    lambda f, name=name, path=path: self._on_recording_file_saved(f, name, path))
             
         except Exception as e:
             self.log("error", f"保存录音文件失败: {str(e)}")
             
-    def _save_wav_file(self, filename, frames, sample_rate, channels):
-        """保存WAV文件"""
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(channels)
-            wf.setsampwidth(self.audio.get_sample_size(self.config.format))
-            wf.setframerate(sample_rate)
-            wf.writeframes(b''.join(frames))
+    def _on_recording_file_saved(self, future: Future, name: str, path: str):
+        """写盘任务完成回调（在线程池中执行），结果交回界面线程处理"""
+        error = future.exception()
+        if error is not None:
+            self.log("error", f"{name}保存失败: {str(error)}")
+            return
+        self.log("info", f"{name}已保存: {path}")
+        self._call_in_ui(self._add_saved_recording, path)
+        
+    def _call_in_ui(self, func, *args):
+        """从后台线程把回调交给界面线程执行；窗口已关闭时忽略"""
+        try:
+            self.root.after(0, func, *args)
+        except (RuntimeError, tk.TclError):
+            pass  # 窗口已关闭，后台任务已完成，无需更新界面
+            
+    def _save_text_async(self, file_path: str, content: str, name: str):
+        """在后台线程池写入文本文件，完成后回到界面线程提示结果"""
+        def write():
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        future = self._io_pool.submit(write)
+        future.add_done_callback(lambda f: self._call_in_ui(self._on_text_saved, f, file_path, name))
+        
+    def _on_text_saved(self, future: Future, file_path: str, name: str):
+        """文本文件写入结束后的界面提示"""
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("错误", f"保存失败: {str(error)}")
+            return
+        messagebox.showinfo("成功", f"{name}已保存")
+        self.log("info", f"{name}已保存: {file_path}")
+            
+    def _add_saved_recording(self, path: str):
+        """记录已保存的录音文件并刷新历史列表"""
+        self.current_audio_files.append(path)
+        self.refresh_history_files()
+            
+    def _save_wav_file(self, filename, frames: bytearray, sample_rate, channels):
+        """保存WAV文件，写入后清空frames释放内存"""
+        try:
+            # 数据长度已知，文件头一次生成；大块录音数据的缓冲写入会直接调用系统write，不产生拷贝
+            header = _wav_header(len(frames), sample_rate, channels, self._sample_size)
+            with open(filename, 'wb') as f:
+                f.write(header)
+                f.write(frames)
+        finally:
+            frames.clear()
             
     # 移除音频合并功能 - 保持麦克风和系统音频完全独立
             
     def update_timer(self):
         """更新录音时长显示"""
         if self.recording and self.start_time:
-            elapsed = time.time() - self.start_time
-            minutes = int(elapsed // 60)
-            seconds = int(elapsed % 60)
-            self.duration_label.config(text=f"时长: {minutes:02d}:{seconds:02d}")
-            self.root.after(1000, self.update_timer)
+            elapsed = time.monotonic() - self.start_time
+            sec = int(elapsed)
+            # 仅在显示的秒数变化时更新标签
+            if sec != self._last_shown_sec:
+                self._duration_var.set(f"时长: {sec // 60:02d}:{sec % 60:02d}")
+                self._last_shown_sec = sec
+            # 对齐到下一个整秒，避免调度误差逐次累积
+            self.root.after(1000 - int(elapsed * 1000) % 1000, self.update_timer)
             
     def initialize_audio_devices(self):
         """初始化音频设备"""
@@ -1106,13 +1941,13 @@ class AudioTranscriber(LoggerMixin):
                 try:
                     device_info = self.audio.get_device_info_by_index(i)
                     if device_info['maxInputChannels'] > 0:
-                        self.audio_devices.append({
-                            'index': i,
-                            'name': device_info['name'],
-                            'channels': device_info['maxInputChannels'],
-                            'sample_rate': device_info['defaultSampleRate'],
-                            'is_loopback': 'loopback' in device_info['name'].lower()
-                        })
+                        self.audio_devices.append(DeviceSpec(
+                            index=i,
+                            name=device_info['name'],
+                            channels=int(device_info['maxInputChannels']),
+                            rate=int(device_info['defaultSampleRate']),
+                            is_loopback='loopback' in device_info['name'].lower()
+                        ))
                 except Exception:
                     continue
                     
@@ -1134,16 +1969,17 @@ class AudioTranscriber(LoggerMixin):
         except Exception:
             # 选择第一个非回环设备
             for device in self.audio_devices:
-                if not device['is_loopback']:
-                    self.microphone_device_index = device['index']
-                    self.log("info", f"选择麦克风设备: {device['name']}")
+                if not device.is_loopback:
+                    self.microphone_device_index = device.index
+                    self.log("info", f"选择麦克风设备: {device.name}")
                     break
                     
         # 选择系统音频设备（回环设备）
         for device in self.audio_devices:
-            if device['is_loopback']:
-                self.system_audio_device_index = device['index']
-                self.log("info", f"选择系统音频设备: {device['name']}")
+            if device.is_loopback:
+                self.system_audio_device_index = device.index
+                self.system_audio_device = device
+                self.log("info", f"选择系统音频设备: {device.name}")
                 break
                 
     # 文件操作相关方法
@@ -1179,23 +2015,39 @@ class AudioTranscriber(LoggerMixin):
             
     def _perform_file_transcription(self):
         """执行文件转写"""
+        text, error = None, None
+        mm = None
         try:
+            # 内存映射文件，转写直接读取页缓存，不把整个文件复制到内存
+            with open(self.current_audio_file, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
             # 文件转写默认使用麦克风源类型
             text = self.transcription_engine.transcribe_audio_data(
-                [open(self.current_audio_file, 'rb').read()], 
+                _wav_pcm_view(mm), 
                 AudioSource.MICROPHONE
             )
-            
-            if text:
-                self.root.after(0, lambda: self._update_transcription_result(text))
-            else:
-                self.root.after(0, lambda: messagebox.showinfo("提示", "未识别到语音内容"))
-                
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("错误", f"转写失败: {str(e)}"))
+            error = str(e)
         finally:
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda: self.transcribe_button.config(state="normal"))
+            if mm is not None:
+                try:
+                    mm.close()
+                except BufferError:
+                    pass  # 仍有数组引用映射内存，由垃圾回收时关闭
+
+            # 所有界面更新合并为一次回调
+            self.root.after(0, self._on_file_transcription_done, text, error)
+            
+    def _on_file_transcription_done(self, text, error):
+        """文件转写结束后的界面更新"""
+        self.progress.stop()
+        self.transcribe_button.config(state="normal")
+        if error:
+            messagebox.showerror("错误", f"转写失败: {error}")
+        elif text:
+            self._update_transcription_result(text)
+        else:
+            messagebox.showinfo("提示", "未识别到语音内容")
             
     def _update_transcription_result(self, text):
         """更新转写结果"""
@@ -1204,6 +2056,7 @@ class AudioTranscriber(LoggerMixin):
         self.mic_text_area.insert(tk.END, text)
         self.mic_text_area.config(state=tk.DISABLED)
         self.save_all_button.config(state="normal")
+        self._enabled_save_buttons.add(self.save_all_button)
         
     def save_mic_text(self):
         """保存麦克风转写文本"""
@@ -1220,13 +2073,7 @@ class AudioTranscriber(LoggerMixin):
         )
         
         if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                messagebox.showinfo("成功", "麦克风转写文本已保存")
-                self.log("info", f"麦克风转写文本已保存: {file_path}")
-            except Exception as e:
-                messagebox.showerror("错误", f"保存失败: {str(e)}")
+            self._save_text_async(file_path, text, "麦克风转写文本")
                 
     def save_sys_text(self):
         """保存系统音频转写文本"""
@@ -1243,13 +2090,7 @@ class AudioTranscriber(LoggerMixin):
         )
         
         if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                messagebox.showinfo("成功", "系统音频转写文本已保存")
-                self.log("info", f"系统音频转写文本已保存: {file_path}")
-            except Exception as e:
-                messagebox.showerror("错误", f"保存失败: {str(e)}")
+            self._save_text_async(file_path, text, "系统音频转写文本")
                 
     def save_all_text(self):
         """保存全部转写文本"""
@@ -1268,20 +2109,12 @@ class AudioTranscriber(LoggerMixin):
         )
         
         if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    if mic_text:
-                        f.write("=== 麦克风转写 ===\n")
-                        f.write(mic_text)
-                        f.write("\n\n")
-                    if sys_text:
-                        f.write("=== 系统音频转写 ===\n")
-                        f.write(sys_text)
-                        f.write("\n")
-                messagebox.showinfo("成功", "全部转写文本已保存")
-                self.log("info", f"全部转写文本已保存: {file_path}")
-            except Exception as e:
-                messagebox.showerror("错误", f"保存失败: {str(e)}")
+            parts = []
+            if mic_text:
+                parts.append(f"=== 麦克风转写 ===\n{mic_text}\n\n")
+            if sys_text:
+                parts.append(f"=== 系统音频转写 ===\n{sys_text}\n")
+            self._save_text_async(file_path, "".join(parts), "全部转写文本")
                 
     def save_text(self):
         """保存转写文本（向后兼容方法）"""
@@ -1300,19 +2133,27 @@ class AudioTranscriber(LoggerMixin):
         self.save_mic_button.config(state="disabled")
         self.save_sys_button.config(state="disabled")
         self.save_all_button.config(state="disabled")
+        self._enabled_save_buttons.clear()
         
     def refresh_history_files(self):
         """刷新历史文件列表"""
         try:
             self.history_files_listbox.delete(0, tk.END)
+            self._history_cache = []
             
-            audio_dir = "audio"
+            audio_dir = AUDIO_DIR
             if os.path.exists(audio_dir):
-                files = [f for f in os.listdir(audio_dir) if f.endswith('.wav')]
-                files.sort(reverse=True)  # 最新的在前
+                with os.scandir(audio_dir) as it:
+                    entries = [entry for entry in it
+                               if entry.name.endswith('.wav') and entry.is_file()]
+                # 按修改时间排序，最新的在前；DirEntry在多数系统上缓存了stat结果
+                entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+                files = [(entry.name, entry.path) for entry in entries]
+                self._history_cache = files
                 
-                for file in files:
-                    self.history_files_listbox.insert(tk.END, file)
+                # 一次调用插入所有文件名，避免逐行跨越Tcl边界
+                if files:
+                    self.history_files_listbox.insert(tk.END, *(name for name, _ in files))
                     
         except Exception as e:
             self.log("error", f"刷新历史文件失败: {str(e)}")
@@ -1320,19 +2161,30 @@ class AudioTranscriber(LoggerMixin):
     def clean_history_files(self):
         """清理历史文件"""
         if messagebox.askyesno("确认", "确定要删除所有历史音频文件吗？"):
-            try:
-                audio_dir = "audio"
-                if os.path.exists(audio_dir):
-                    for file in os.listdir(audio_dir):
-                        if file.endswith('.wav'):
-                            os.remove(os.path.join(audio_dir, file))
-                            
-                self.refresh_history_files()
-                messagebox.showinfo("成功", "历史文件已清理")
-                self.log("info", "历史音频文件已清理")
-                
-            except Exception as e:
-                messagebox.showerror("错误", f"清理失败: {str(e)}")
+            # 删除文件在后台线程池进行，完成后回到界面线程刷新列表
+            future = self._io_pool.submit(self._remove_history_files)
+            future.add_done_callback(lambda f: self._call_in_ui(self._on_history_cleaned, f))
+            
+    @staticmethod
+    def _remove_history_files():
+        """删除音频目录中的所有WAV文件"""
+        try:
+            with os.scandir(AUDIO_DIR) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.wav') and entry.is_file():
+                        os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # 音频目录不存在，无需清理
+            
+    def _on_history_cleaned(self, future: Future):
+        """历史文件清理结束后的界面更新"""
+        self.refresh_history_files()
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("错误", f"清理失败: {str(error)}")
+            return
+        messagebox.showinfo("成功", "历史文件已清理")
+        self.log("info", "历史音频文件已清理")
                 
     def play_history_file(self):
         """播放历史文件"""
@@ -1341,8 +2193,7 @@ class AudioTranscriber(LoggerMixin):
             messagebox.showwarning("警告", "请先选择要播放的文件")
             return
             
-        filename = self.history_files_listbox.get(selection[0])
-        file_path = os.path.join("audio", filename)
+        _, file_path = self._history_cache[selection[0]]
         
         if os.path.exists(file_path):
             self.play_audio_file(file_path)
@@ -1356,11 +2207,10 @@ class AudioTranscriber(LoggerMixin):
             messagebox.showwarning("警告", "请先选择要删除的文件")
             return
             
-        filename = self.history_files_listbox.get(selection[0])
+        filename, file_path = self._history_cache[selection[0]]
         
         if messagebox.askyesno("确认", f"确定要删除文件 {filename} 吗？"):
             try:
-                file_path = os.path.join("audio", filename)
                 if os.path.exists(file_path):
                     os.remove(file_path)
                     self.refresh_history_files()
@@ -1373,7 +2223,7 @@ class AudioTranscriber(LoggerMixin):
                 
     def open_history_folder(self):
         """打开历史文件夹"""
-        audio_dir = os.path.abspath("audio")
+        audio_dir = AUDIO_DIR
         if os.path.exists(audio_dir):
             self.open_folder(audio_dir)
         else:
@@ -1403,42 +2253,25 @@ class AudioTranscriber(LoggerMixin):
     def append_mic_text(self, text: str):
         """添加麦克风转写文本"""
         if text and text.strip():
-            self.mic_text_area.config(state=tk.NORMAL)
-            self.mic_text_area.insert(tk.END, text + "\n")
-            self.mic_text_area.see(tk.END)
-            self.mic_text_area.config(state=tk.DISABLED)
-            self.save_mic_button.config(state="normal")
-            self.save_all_button.config(state="normal")
+            self._append_transcript(self.mic_text_area, text, self.save_mic_button)
             
     def append_sys_text(self, text: str):
         """添加系统音频转写文本"""
         if text and text.strip():
-            self.sys_text_area.config(state=tk.NORMAL)
-            self.sys_text_area.insert(tk.END, text + "\n")
-            self.sys_text_area.see(tk.END)
-            self.sys_text_area.config(state=tk.DISABLED)
-            self.save_sys_button.config(state="normal")
-            self.save_all_button.config(state="normal")
+            self._append_transcript(self.sys_text_area, text, self.save_sys_button)
             
-    def toggle_recording(self):
-        """切换录音状态"""
-        if self.recording:
-            self.stop_recording()
-        else:
-            self.start_recording()
+    def _append_transcript(self, text_area, text: str, save_button):
+        """在转写文本框末尾追加一段文本：每次界面刷新每个文本框只解锁、锁定一次"""
+        text_area.config(state=tk.NORMAL)
+        text_area.insert(tk.END, text + "\n")
+        text_area.see(tk.END)
+        text_area.config(state=tk.DISABLED)
+        # 保存按钮只在首次有内容时启用，之后不再重复设置
+        for button in (save_button, self.save_all_button):
+            if button not in self._enabled_save_buttons:
+                button.config(state="normal")
+                self._enabled_save_buttons.add(button)
             
-    def toggle_microphone(self):
-        """切换麦克风开关"""
-        self.microphone_enabled = self.mic_var.get()
-        status = "启用" if self.microphone_enabled else "禁用"
-        self.log("info", f"麦克风已{status}")
-        
-    def toggle_system_audio(self):
-        """切换系统音频开关"""
-        self.system_audio_enabled = self.sys_var.get()
-        status = "启用" if self.system_audio_enabled else "禁用"
-        self.log("info", f"系统音频已{status}")
-        
     def on_closing(self):
         """窗口关闭事件处理"""
         try:
@@ -1451,6 +2284,9 @@ class AudioTranscriber(LoggerMixin):
                 self.microphone_worker.stop()
             if self.system_audio_worker:
                 self.system_audio_worker.stop()
+            self.transcription_engine.shutdown()
+            # 不等待写盘任务，线程池中的任务在解释器退出前仍会完成
+            self._io_pool.shutdown(wait=False)
                 
             # 关闭音频
             if hasattr(self, 'audio'):
@@ -9,6 +9,87 @@ import pyaudiowpatch as pyaudio
 import time
 import threading
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# 测试设备时等待第一块数据的最长时间（秒）
+READ_TIMEOUT = 3.0
+
+# 并行测试设备时，PortAudio的查询、打开和关闭调用串行执行；等待数据期间不持有锁
+_PA_LOCK = threading.Lock()
+
+# 进程内的设备枚举缓存：键为(类别, 主机API数, 设备数)，设备插拔后键随之变化
+_DEVICE_CACHE = {}
+
+# 进程内共用的PyAudio实例；WASAPI下每次创建/销毁都要初始化COM，开销明显
+_PYAUDIO = None
+
+def get_pyaudio():
+    """返回共用的PyAudio实例，首次调用时创建"""
+    global _PYAUDIO
+    with _PA_LOCK:
+        if _PYAUDIO is None:
+            _PYAUDIO = pyaudio.PyAudio()
+        return _PYAUDIO
+
+def release_pyaudio():
+    """销毁共用的PyAudio实例，下次get_pyaudio()时重新创建"""
+    global _PYAUDIO
+    with _PA_LOCK:
+        if _PYAUDIO is not None:
+            _PYAUDIO.terminate()
+            _PYAUDIO = None
+
+def _device_cache_key(p, kind):
+    """缓存键：主机API数和设备数不变时视为设备配置未变化"""
+    return (kind, p.get_host_api_count(), p.get_device_count())
+
+def get_cached_devices(p):
+    """返回所有设备的(索引, 设备信息, 错误)列表，同一设备配置只枚举一次"""
+    key = _device_cache_key(p, 'devices')
+    devices = _DEVICE_CACHE.get(key)
+    if devices is None:
+        devices = []
+        for i in range(key[2]):
+            try:
+                devices.append((i, p.get_device_info_by_index(i), None))
+            except Exception as e:
+                devices.append((i, None, e))
+        _DEVICE_CACHE[key] = devices
+    return devices
+
+def get_cached_device_info(p, device_index):
+    """从缓存中查找设备信息，找不到时返回None"""
+    for i, device_info, _ in get_cached_devices(p):
+        if i == device_index:
+            return device_info
+    return None
+
+def get_cached_loopback_devices(p):
+    """返回所有WASAPI loopback设备信息列表，同一设备配置只枚举一次"""
+    key = _device_cache_key(p, 'loopback')
+    devices = _DEVICE_CACHE.get(key)
+    if devices is None:
+        devices = list(p.get_loopback_device_info_generator())
+        _DEVICE_CACHE[key] = devices
+    return devices
+
+def low_latency_frames(device_info, rate):
+    """按设备的默认低输入延迟计算每次回调的帧数，取不小于256的2的幂"""
+    latency = 0.02
+    if device_info is not None:
+        latency = device_info.get('defaultLowInputLatency') or latency
+    frames = max(256, int(latency * rate))
+    return 1 << (frames - 1).bit_length()
+
+def get_cached_default_loopback(p):
+    """返回默认WASAPI loopback设备信息，同一进程内只查询一次
+    
+    结果不跨运行保存：用户随时可能切换默认播放设备，每次运行都重新查询。
+    """
+    key = _device_cache_key(p, 'default_loopback')
+    if key not in _DEVICE_CACHE:
+        _DEVICE_CACHE[key] = p.get_default_wasapi_loopback()
+    return _DEVICE_CACHE[key]
 
 def print_separator(title):
     """打印分隔线"""
@@ -16,12 +97,11 @@ def print_separator(title):
     print(f" {title} ")
     print("="*60)
 
-def test_basic_audio_system():
+def test_basic_audio_system(p):
     """测试基本音频系统"""
     print_separator("基本音频系统测试")
     
     try:
-        p = pyaudio.PyAudio()
         print("✅ PyAudioWPatch 初始化成功")
         
         # 获取设备数量
@@ -36,28 +116,25 @@ def test_basic_audio_system():
             host_api_info = p.get_host_api_info_by_index(i)
             print(f"   API {i}: {host_api_info['name']} (设备数: {host_api_info['deviceCount']})")
         
-        p.terminate()
         return True
         
     except Exception as e:
-        print(f"❌ PyAudioWPatch 初始化失败: {e}")
+        print(f"❌ 查询音频系统信息失败: {e}")
         return False
 
-def list_all_devices():
+def list_all_devices(p):
     """列出所有音频设备"""
     print_separator("所有音频设备列表")
     
     try:
-        p = pyaudio.PyAudio()
-        device_count = p.get_device_count()
-        
         input_devices = []
         output_devices = []
         
-        for i in range(device_count):
+        for i, device_info, error in get_cached_devices(p):
+            if error is not None:
+                print(f"❌ 无法获取设备 {i} 信息: {error}")
+                continue
             try:
-                device_info = p.get_device_info_by_index(i)
-                
                 device_type = []
                 if device_info['maxInputChannels'] > 0:
                     device_type.append("输入")
@@ -81,29 +158,38 @@ def list_all_devices():
         
         print(f"📊 总结: {len(input_devices)} 个输入设备, {len(output_devices)} 个输出设备")
         
-        p.terminate()
         return input_devices, output_devices
         
     except Exception as e:
         print(f"❌ 列出设备失败: {e}")
         return [], []
 
-def test_wasapi_loopback_devices():
-    """测试WASAPI loopback设备"""
+def test_wasapi_loopback_devices(p):
+    """测试WASAPI loopback设备，返回[(设备信息, 是否可用), ...]"""
     print_separator("WASAPI Loopback 设备测试")
     
     try:
-        p = pyaudio.PyAudio()
-        
-        # 使用PyAudioWPatch的loopback设备生成器
-        loopback_devices = []
+        # 使用PyAudioWPatch的loopback设备生成器，记录每个设备的测试结果
+        results = []
         
         print("🔍 扫描 WASAPI Loopback 设备...")
         
         try:
-            for loopback_info in p.get_loopback_device_info_generator():
-                loopback_devices.append(loopback_info)
-                
+            loopback_devices = get_cached_loopback_devices(p)
+            get_cached_devices(p)  # 先在主线程填充设备缓存
+            
+            def probe(loopback_info):
+                # 各设备的输出先收集起来，测试结束后按顺序打印，避免并行输出交错
+                lines = []
+                available = test_loopback_device(p, loopback_info['index'], loopback_info['name'],
+                                                 log=lines.append)
+                return lines, available
+            
+            # 各设备等待数据的时间相互重叠，总耗时约为单个设备的耗时
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(loopback_devices)))) as executor:
+                probes = list(executor.map(probe, loopback_devices))
+            
+            for loopback_info, (lines, available) in zip(loopback_devices, probes):
                 print(f"\n📱 Loopback 设备 {loopback_info['index']}: {loopback_info['name']}")
                 print(f"   输入通道: {loopback_info['maxInputChannels']}")
                 print(f"   输出通道: {loopback_info['maxOutputChannels']}")
@@ -112,7 +198,9 @@ def test_wasapi_loopback_devices():
                 
                 # 测试设备可用性
                 print("   测试设备可用性...")
-                available = test_loopback_device(p, loopback_info['index'], loopback_info['name'])
+                for line in lines:
+                    print(line)
+                results.append((loopback_info, available))
                 status = "✅ 可用" if available else "❌ 不可用"
                 print(f"   状态: {status}")
                 
@@ -122,10 +210,15 @@ def test_wasapi_loopback_devices():
         # 尝试获取默认WASAPI loopback设备
         print("\n🎯 测试默认 WASAPI Loopback 设备...")
         try:
-            default_loopback = p.get_default_wasapi_loopback()
+            default_loopback = get_cached_default_loopback(p)
             if default_loopback:
                 print(f"✅ 找到默认 WASAPI Loopback: {default_loopback['name']}")
-                available = test_loopback_device(p, default_loopback['index'], default_loopback['name'])
+                # 已在上面测试过的设备直接使用其结果
+                tested = {info['index']: ok for info, ok in results}
+                if default_loopback['index'] in tested:
+                    available = tested[default_loopback['index']]
+                else:
+                    available = test_loopback_device(p, default_loopback['index'], default_loopback['name'])
                 status = "✅ 可用" if available else "❌ 不可用"
                 print(f"   状态: {status}")
             else:
@@ -133,54 +226,75 @@ def test_wasapi_loopback_devices():
         except Exception as e:
             print(f"❌ 获取默认 WASAPI Loopback 失败: {e}")
         
-        p.terminate()
-        return loopback_devices
+        return results
         
     except Exception as e:
         print(f"❌ WASAPI Loopback 测试失败: {e}")
         return []
 
-def test_loopback_device(p, device_index, device_name):
-    """测试单个loopback设备"""
+def test_loopback_device(p, device_index, device_name, log=print):
+    """测试单个loopback设备，log用于输出测试过程（并行测试时收集后统一打印）"""
     # 获取设备信息以确定支持的采样率
-    try:
-        device_info = p.get_device_info_by_index(device_index)
+    with _PA_LOCK:
+        device_info = get_cached_device_info(p, device_index)
+    if device_info is not None:
         default_rate = int(device_info['defaultSampleRate'])
-        print(f"     设备默认采样率: {default_rate}Hz")
-    except:
+        log(f"     设备默认采样率: {default_rate}Hz")
+    else:
         default_rate = 48000  # 大多数现代设备的默认采样率
     
-    # 尝试多个常见采样率
-    sample_rates = [default_rate, 48000, 44100, 96000, 192000]
-    
+    # 尝试多个常见采样率（去重并保持顺序），先用轻量的格式查询筛掉不支持的采样率，再打开设备
+    sample_rates = list(dict.fromkeys([default_rate, 48000, 44100, 96000, 192000]))
+    supported_rates = []
     for rate in sample_rates:
         try:
-            print(f"     尝试采样率: {rate}Hz")
+            with _PA_LOCK:
+                p.is_format_supported(rate, input_device=device_index, input_channels=2,
+                                      input_format=pyaudio.paInt16)
+            supported_rates.append(rate)
+        except Exception as e:
+            log(f"     ❌ 不支持采样率 {rate}Hz: {e}")
+    
+    for rate in supported_rates:
+        try:
+            log(f"     尝试采样率: {rate}Hz")
+            # 回调方式读取：没有音频输出时loopback设备不产生数据，阻塞读取会一直等待
+            received = []
+            ready = threading.Event()
+            
+            def callback(in_data, frame_count, time_info, status):
+                received.append(len(in_data))
+                ready.set()
+                return (None, pyaudio.paComplete)
+            
             # 尝试打开loopback设备 - PyAudioWPatch直接通过设备索引访问loopback设备
-            stream = p.open(
-                format=pyaudio.paInt16,
-                channels=2,  # 立体声
-                rate=rate,
-                input=True,
-                input_device_index=device_index,
-                frames_per_buffer=1024
-            )
+            with _PA_LOCK:
+                stream = p.open(
+                    format=pyaudio.paInt16,
+                    channels=2,  # 立体声
+                    rate=rate,
+                    input=True,
+                    input_device_index=device_index,
+                    frames_per_buffer=low_latency_frames(device_info, rate),
+                    stream_callback=callback
+                )
             
-            # 尝试读取一些数据
-            try:
-                data = stream.read(1024, exception_on_overflow=False)
-                print(f"     ✅ 成功读取 {len(data)} 字节数据 (采样率: {rate}Hz)")
-            except Exception as read_error:
-                print(f"     ⚠️  读取数据时出错: {read_error}")
+            # 等待第一块数据，最多3秒
+            if ready.wait(READ_TIMEOUT):
+                log(f"     ✅ 成功读取 {received[0]} 字节数据 (采样率: {rate}Hz)")
+            else:
+                log(f"     ⚠️  {READ_TIMEOUT:.0f}秒内未收到数据（可能没有音频正在播放）")
             
-            stream.close()
+            with _PA_LOCK:
+                stream.stop_stream()
+                stream.close()
             return True
             
         except Exception as e:
-            print(f"     ❌ 采样率 {rate}Hz 失败: {e}")
+            log(f"     ❌ 采样率 {rate}Hz 失败: {e}")
             continue
     
-    print(f"     ❌ 所有采样率都失败")
+    log(f"     ❌ 所有采样率都失败")
     return False
 
 def check_audio_output_activity():
@@ -246,16 +360,27 @@ def main():
     print("🎵 WASAPI Loopback 设备诊断工具")
     print("此工具将帮助诊断和解决 WASAPI loopback 设备不可用的问题")
     
-    # 1. 测试基本音频系统
-    if not test_basic_audio_system():
+    # 各步骤共用一个PyAudio实例
+    try:
+        p = get_pyaudio()
+    except Exception as e:
+        print(f"❌ PyAudioWPatch 初始化失败: {e}")
         print("\n❌ 基本音频系统测试失败，请检查 PyAudioWPatch 安装")
         return
     
-    # 2. 列出所有设备
-    input_devices, output_devices = list_all_devices()
-    
-    # 3. 测试WASAPI loopback设备
-    loopback_devices = test_wasapi_loopback_devices()
+    try:
+        # 1. 测试基本音频系统
+        if not test_basic_audio_system(p):
+            print("\n❌ 基本音频系统测试失败，请检查 PyAudioWPatch 安装")
+            return
+        
+        # 2. 列出所有设备
+        input_devices, output_devices = list_all_devices(p)
+        
+        # 3. 测试WASAPI loopback设备
+        loopback_results = test_wasapi_loopback_devices(p)
+    finally:
+        release_pyaudio()
     
     # 4. 检查音频输出活动
     check_audio_output_activity()
@@ -266,9 +391,8 @@ def main():
     # 总结
     print_separator("诊断总结")
     
-    available_loopback = sum(1 for device in loopback_devices if test_loopback_device(
-        pyaudio.PyAudio(), device['index'], device['name']
-    ))
+    # 直接使用第3步的测试结果，不再重新打开每个设备
+    available_loopback = sum(1 for _, available in loopback_results if available)
     
     if available_loopback > 0:
         print(f"✅ 找到 {available_loopback} 个可用的 WASAPI Loopback 设备")
@@ -10,11 +10,57 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import threading
-import time
+import wave
 import queue
 import sys
 from datetime import datetime
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+from diagnose_wasapi import get_cached_default_loopback, get_cached_devices, low_latency_frames
+
+# 录制时长到达时放入音频队列的结束标记
+_STOP = object()
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _sum_sumsq_peak(x):
+        """单次遍历求和、平方和与最大幅度"""
+        total = 0.0
+        total_sq = 0.0
+        peak = 0.0
+        for i in range(x.shape[0]):
+            v = float(x[i])
+            total += v
+            total_sq += v * v
+            if abs(v) > peak:
+                peak = abs(v)
+        return total, total_sq, peak
+
+def envelope(x, n):
+    """把x分成n段，返回每段的最小值和最大值（波形包络）"""
+    w = len(x) // n
+    v = x[:w * n].reshape(n, w)
+    return v.min(axis=1), v.max(axis=1)
+
+def signal_stats(x):
+    """返回(RMS, 最大幅度, 标准差)，三个统计量共用求和与平方和，不产生中间数组"""
+    n = len(x)
+    if NUMBA_AVAILABLE:
+        total, total_sq, peak = _sum_sumsq_peak(x)
+    else:
+        xf = x if x.dtype == np.float32 else x.astype(np.float32)
+        total = float(xf.sum(dtype=np.float64))
+        total_sq = float(np.dot(xf, xf))
+        peak = float(max(xf.max(), -xf.min()))
+    mean = total / n
+    mean_sq = total_sq / n
+    return np.sqrt(mean_sq), peak, np.sqrt(max(mean_sq - mean * mean, 0.0))
+
 class LoopbackAudioTester:
     def __init__(self):
         self.CHUNK = 1024
@@ -22,34 +68,41 @@ class LoopbackAudioTester:
         self.CHANNELS = 1  # 输出单声道
         self.RATE = 48000  # 使用设备默认采样率
         self.RECORD_SECONDS = 10
+        self.CHANNEL_LOG_INTERVAL = 50  # 每隔多少帧打印一次通道分析
+        self.ENVELOPE_BINS = 2000  # 完整波形图的包络点数
         
         self.audio = pyaudio.PyAudio()
         self.stream = None
         self.audio_queue = queue.Queue()
         self.recording = False
         
-        # 用于存储音频数据
-        self.audio_data = []
-        self.time_data = []
+        # 录制的音频边录边写入WAV文件，内存中只保留当前数据块；write_idx为已写入的采样点数
+        self.wav_path = None
+        self._wav = None
+        self.write_idx = 0
+        self._log_counter = 0
+        self._spectrum = None  # (频率, 幅度)，分析和绘图共用，只计算一次
+        
+        # 通道混音复用的缓冲区，每个数据块只做计算不再分配内存；多通道缓冲区在首次使用时按通道数分配
+        self._scratch_rf = None
+        self._scratch_mono = np.empty(self.CHUNK, dtype=np.float32)
+        self._scratch_out = np.empty(self.CHUNK, dtype=np.int16)
         
     def find_loopback_device(self):
         """查找WASAPI Loopback设备"""
         print("\n=== 扫描WASAPI Loopback设备 ===")
         
         loopback_devices = []
-        device_count = self.audio.get_device_count()
         
-        for i in range(device_count):
-            try:
-                device_info = self.audio.get_device_info_by_index(i)
-                if device_info.get('name', '').find('Loopback') != -1:
-                    loopback_devices.append((i, device_info))
-                    print(f"设备 {i}: {device_info['name']}")
-                    print(f"  通道数: {device_info['maxInputChannels']}")
-                    print(f"  采样率: {device_info['defaultSampleRate']}Hz")
-                    print()
-            except Exception as e:
+        for i, device_info, error in get_cached_devices(self.audio):
+            if error is not None:
                 continue
+            if device_info.get('name', '').find('Loopback') != -1:
+                loopback_devices.append((i, device_info))
+                print(f"设备 {i}: {device_info['name']}")
+                print(f"  通道数: {device_info['maxInputChannels']}")
+                print(f"  采样率: {device_info['defaultSampleRate']}Hz")
+                print()
                 
         if not loopback_devices:
             print("❌ 未找到WASAPI Loopback设备")
@@ -62,9 +115,23 @@ class LoopbackAudioTester:
                 hecate_device = (device_index, device_info)
                 break
         
+        # 其次选择默认播放设备对应的loopback设备
+        default_device = None
+        if not hecate_device:
+            try:
+                default_info = get_cached_default_loopback(self.audio)
+            except Exception:
+                default_info = None
+            if default_info:
+                default_device = next((device for device in loopback_devices
+                                       if device[0] == default_info['index']), None)
+        
         if hecate_device:
             device_index, device_info = hecate_device
             print(f"✅ 选择HECATE设备: {device_info['name']}")
+        elif default_device:
+            device_index, device_info = default_device
+            print(f"✅ 选择默认Loopback设备: {device_info['name']}")
         else:
             # 如果没有HECATE设备，选择第一个可用的loopback设备
             device_index, device_info = loopback_devices[0]
@@ -77,77 +144,61 @@ class LoopbackAudioTester:
         return device_index, device_info
     
     def analyze_channel_data(self, data, channels):
-        """分析多通道音频数据"""
+        """分析多通道音频数据，返回的单声道数组在下次调用时会被复用"""
         if channels == 1:
-            return data
+            return np.frombuffer(data, dtype=np.int16)
             
-        # 转换为numpy数组
+        # 转换为numpy数组并重新整形为(samples, channels)，帧数以实际收到的数据为准
         audio_array = np.frombuffer(data, dtype=np.int16)
-        
-        if len(audio_array) < self.CHUNK * channels:
-            return np.zeros(self.CHUNK, dtype=np.int16)
-            
-        # 重新整形为(samples, channels)
         try:
-            reshaped = audio_array[:self.CHUNK * channels].reshape(self.CHUNK, channels)
+            reshaped = audio_array[:len(audio_array) - len(audio_array) % channels].reshape(-1, channels)
+            frames = reshaped.shape[0]
+            if self._scratch_rf is None or self._scratch_rf.shape != reshaped.shape:
+                self._scratch_rf = np.empty(reshaped.shape, dtype=np.float32)
+            if frames > len(self._scratch_mono):
+                self._scratch_mono = np.empty(frames, dtype=np.float32)
+                self._scratch_out = np.empty(frames, dtype=np.int16)
+            rf = self._scratch_rf
+            np.copyto(rf, reshaped)
             
-            # 分析各通道特征
-            print(f"\n--- 通道分析 (时间: {datetime.now().strftime('%H:%M:%S')}) ---")
-            channel_stats = []
-            for ch in range(min(channels, 8)):
-                ch_data = reshaped[:, ch]
-                ch_std = np.std(ch_data)
-                ch_max = np.max(np.abs(ch_data))
-                ch_rms = np.sqrt(np.mean(ch_data.astype(np.float32)**2))
-                channel_stats.append({
-                    'channel': ch,
-                    'std': ch_std,
-                    'max': ch_max,
-                    'rms': ch_rms,
-                    'data': ch_data
-                })
-                print(f"CH{ch}: std={ch_std:.1f}, max={ch_max}, rms={ch_rms:.1f}")
+            # 打印会阻塞回调数据的处理，只每隔CHANNEL_LOG_INTERVAL帧打印一次
+            verbose = self._log_counter % self.CHANNEL_LOG_INTERVAL == 0
+            self._log_counter += 1
             
-            # 使用改进的downmix算法
-            if channels == 2:
-                # 立体声
-                mono_data = ((reshaped[:, 0].astype(np.float32) + reshaped[:, 1].astype(np.float32)) / 2).astype(np.int16)
-            elif channels <= 8:
-                # 多通道 - 主要使用前两个通道
-                left = reshaped[:, 0].astype(np.float32)
-                right = reshaped[:, 1].astype(np.float32) if channels > 1 else left
-                
-                # 检查其他通道是否有有效数据
-                other_channels = np.zeros_like(left)
-                active_other_channels = 0
-                
-                if channels > 2:
-                    for ch in range(2, min(channels, 8)):
-                        ch_data = reshaped[:, ch].astype(np.float32)
-                        # 检查通道是否有有效且不同的数据
-                        if (np.std(ch_data) > 100 and 
-                            not np.allclose(ch_data, left, atol=1000) and 
-                            not np.allclose(ch_data, right, atol=1000)):
-                            other_channels += ch_data * 0.1
-                            active_other_channels += 1
-                            print(f"  -> CH{ch} 包含有效数据，已混入")
-                
-                print(f"  -> 活跃的其他通道数: {active_other_channels}")
-                
-                # 主要基于立体声，少量混入其他通道
-                mono_data = ((left + right) / 2 + other_channels * 0.2).astype(np.int16)
-                mono_data = np.clip(mono_data, -32768, 32767)
-            else:
-                # 超过8通道，只使用前两个
-                left = reshaped[:, 0].astype(np.float32)
-                right = reshaped[:, 1].astype(np.float32) if channels > 1 else left
-                mono_data = ((left + right) / 2).astype(np.int16)
+            if verbose:
+                # 分析各通道特征：前8个通道的统计量一次计算完成，汇总为一行输出
+                stats_data = rf[:, :min(channels, 8)]
+                stds = stats_data.std(axis=0)
+                maxs = np.abs(stats_data).max(axis=0)
+                rms = np.sqrt((stats_data * stats_data).mean(axis=0))
+                print(f"\n--- 通道分析 (时间: {datetime.now().strftime('%H:%M:%S')}) ---")
+                print(f"std={np.array2string(stds, precision=1)} "
+                      f"max={np.array2string(maxs, precision=0)} "
+                      f"rms={np.array2string(rms, precision=1)}")
+            
+            # 使用改进的downmix算法：混音权重向量，一次矩阵乘法完成
+            # 主要基于立体声，其他通道（不超过8通道时）有有效且不同的数据才少量混入
+            weights = np.zeros(channels, dtype=np.float32)
+            weights[:2] = 0.5
+            if 2 < channels <= 8:
+                others = rf[:, 2:channels]
+                active = ((others.std(axis=0) > 100) &
+                          (np.abs(others - rf[:, 0:1]).max(axis=0) > 1000) &
+                          (np.abs(others - rf[:, 1:2]).max(axis=0) > 1000))
+                weights[2:][active] = 0.1 * 0.2
+                if verbose:
+                    active_channels = ", ".join(f"CH{ch}" for ch in np.flatnonzero(active) + 2)
+                    print(f"  -> 活跃的其他通道数: {int(active.sum())} {active_channels}")
             
+            mono = np.matmul(rf, weights, out=self._scratch_mono[:frames])
+            np.clip(mono, -32768, 32767, out=mono)
+            mono_data = self._scratch_out[:frames]
+            np.copyto(mono_data, mono, casting='unsafe')
             return mono_data
             
         except Exception as e:
             print(f"❌ 通道分析错误: {e}")
-            return np.zeros(self.CHUNK, dtype=np.int16)
+            return np.zeros(len(data) // (channels * 2), dtype=np.int16)
     
     def audio_callback(self, in_data, frame_count, time_info, status):
         """音频回调函数"""
@@ -169,6 +220,22 @@ class LoopbackAudioTester:
             print(f"采样率: {self.RATE}Hz")
             print(f"录制时长: {self.RECORD_SECONDS}秒")
             
+            # 每次回调的帧数按设备的低延迟参数确定，混音缓冲区随之调整
+            self.CHUNK = low_latency_frames(device_info, self.RATE)
+            self._scratch_mono = np.empty(self.CHUNK, dtype=np.float32)
+            self._scratch_out = np.empty(self.CHUNK, dtype=np.int16)
+            print(f"缓冲帧数: {self.CHUNK}")
+            
+            # 打开录音文件，单声道16位
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.wav_path = f'loopback_audio_{timestamp}.wav'
+            self._wav = wave.open(self.wav_path, 'wb')
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.RATE)
+            self.write_idx = 0
+            print(f"录音文件: {self.wav_path}")
+            
             # 创建音频流
             self.stream = self.audio.open(
                 format=self.FORMAT,
@@ -183,72 +250,79 @@ class LoopbackAudioTester:
             self.recording = True
             self.stream.start_stream()
             
-            # 录制音频数据
-            start_time = time.time()
+            # 录制音频数据：阻塞等待回调送来的数据，到时由定时器放入结束标记
             frame_count = 0
+            timer = threading.Timer(self.RECORD_SECONDS, self.audio_queue.put, args=(_STOP,))
+            timer.daemon = True
+            timer.start()
             
-            while self.recording and (time.time() - start_time) < self.RECORD_SECONDS:
-                try:
-                    # 从队列获取音频数据
-                    data = self.audio_queue.get(timeout=1.0)
-                    
-                    # 分析并转换音频数据
-                    mono_data = self.analyze_channel_data(data, device_channels)
-                    
-                    # 存储音频数据用于分析
-                    self.audio_data.extend(mono_data)
-                    current_time = time.time() - start_time
-                    self.time_data.extend([current_time + i/self.RATE for i in range(len(mono_data))])
-                    
+            try:
+                for data in iter(self.audio_queue.get, _STOP):
+                    self._process_recorded_chunk(data, device_channels, frame_count + 1)
                     frame_count += 1
-                    if frame_count % 20 == 0:  # 每20帧打印一次状态
-                        rms = np.sqrt(np.mean(mono_data.astype(np.float32)**2))
-                        print(f"帧 {frame_count}: RMS={rms:.1f}, 最大值={np.max(np.abs(mono_data))}")
-                        
-                except queue.Empty:
-                    print("⚠️ 音频队列超时")
-                    continue
-                except Exception as e:
-                    print(f"❌ 处理音频数据错误: {e}")
-                    break
+            except Exception as e:
+                print(f"❌ 处理音频数据错误: {e}")
+            finally:
+                timer.cancel()
             
-            print(f"\n✅ 录制完成，共录制 {len(self.audio_data)} 个采样点")
+            print(f"\n✅ 录制完成，共录制 {self.write_idx} 个采样点")
             
         except Exception as e:
             print(f"❌ 录制错误: {e}")
         finally:
             self.stop_recording()
     
+    def _process_recorded_chunk(self, data, device_channels, frame_count):
+        """处理一块录制的音频：混为单声道、写入文件，定期打印状态"""
+        # 分析并转换音频数据
+        mono_data = self.analyze_channel_data(data, device_channels)
+        
+        # 音频数据直接写入文件，分析时再映射读取
+        self._wav.writeframes(mono_data.tobytes())
+        self.write_idx += len(mono_data)
+        
+        if frame_count % 20 == 0:  # 每20帧打印一次状态
+            rms = np.sqrt(np.mean(mono_data.astype(np.float32)**2))
+            print(f"帧 {frame_count}: RMS={rms:.1f}, 最大值={np.max(np.abs(mono_data))}")
+    
     def stop_recording(self):
         """停止录制"""
         self.recording = False
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
+            self.stream = None
+        if self._wav:
+            self._wav.close()
+            self._wav = None
+        
+    def _load_recording(self):
+        """以内存映射方式读取录音文件中的采样数据（不复制到内存）"""
+        # wave模块写入的PCM文件头固定为44字节
+        return np.memmap(self.wav_path, dtype=np.int16, mode='r', offset=44, shape=(self.write_idx,))
         
     def analyze_audio(self):
         """分析录制的音频数据"""
-        if not self.audio_data:
+        if self.write_idx == 0:
             print("❌ 没有音频数据可分析")
             return
             
-        audio_array = np.array(self.audio_data, dtype=np.float32)
-        time_array = np.array(self.time_data)
+        audio_array = self._load_recording().astype(np.float32)
+        # 时间轴由采样点序号直接换算
+        time_array = np.arange(self.write_idx) / self.RATE
         
         print(f"\n=== 音频分析结果 ===")
         print(f"总采样点数: {len(audio_array)}")
         print(f"录制时长: {time_array[-1]:.2f}秒")
-        print(f"RMS值: {np.sqrt(np.mean(audio_array**2)):.2f}")
-        print(f"最大值: {np.max(np.abs(audio_array)):.2f}")
-        print(f"标准差: {np.std(audio_array):.2f}")
+        rms_value, max_value, std_value = signal_stats(audio_array)
+        print(f"RMS值: {rms_value:.2f}")
+        print(f"最大值: {max_value:.2f}")
+        print(f"标准差: {std_value:.2f}")
         
         # 检查是否有明显的音频信号
         rms_threshold = 100  # RMS阈值
         max_threshold = 1000  # 最大值阈值
         
-        rms_value = np.sqrt(np.mean(audio_array**2))
-        max_value = np.max(np.abs(audio_array))
-        
         if rms_value > rms_threshold and max_value > max_threshold:
             print("✅ 检测到有效音频信号")
         else:
@@ -256,14 +330,12 @@ class LoopbackAudioTester:
             
         # 检查是否有电流声特征（高频噪音）
         # 计算频谱
-        fft = np.fft.fft(audio_array)
-        freqs = np.fft.fftfreq(len(audio_array), 1/self.RATE)
-        magnitude = np.abs(fft)
+        freqs, magnitude = self._compute_spectrum(audio_array)
         
-        # 检查高频部分的能量
-        high_freq_mask = freqs > 8000  # 8kHz以上
-        high_freq_energy = np.mean(magnitude[high_freq_mask])
-        total_energy = np.mean(magnitude)
+        # 检查高频部分的能量（rfftfreq单调递增，8kHz以上是一段连续切片）
+        cutoff = np.searchsorted(freqs, 8000, side='right')
+        high_freq_energy = magnitude[cutoff:].mean()
+        total_energy = magnitude.mean()
         
         high_freq_ratio = high_freq_energy / total_energy if total_energy > 0 else 0
         
@@ -273,21 +345,33 @@ class LoopbackAudioTester:
         else:
             print("✅ 高频噪音水平正常")
     
+    def _compute_spectrum(self, audio_array):
+        """计算实数FFT幅度谱，结果缓存供分析和绘图共用"""
+        if self._spectrum is None or len(self._spectrum[0]) != len(audio_array) // 2 + 1:
+            freqs = np.fft.rfftfreq(len(audio_array), 1/self.RATE)
+            magnitude = np.abs(np.fft.rfft(audio_array))
+            self._spectrum = (freqs, magnitude)
+        return self._spectrum
+    
     def plot_audio(self):
         """绘制音频波形和频谱图"""
-        if not self.audio_data:
+        if self.write_idx == 0:
             print("❌ 没有音频数据可绘制")
             return
             
-        audio_array = np.array(self.audio_data, dtype=np.float32)
-        time_array = np.array(self.time_data)
+        audio_array = self._load_recording().astype(np.float32)
+        # 时间轴由采样点序号直接换算
+        time_array = np.arange(self.write_idx) / self.RATE
         
         # 创建图形
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
         fig.suptitle('WASAPI Loopback音频分析', fontsize=16)
         
-        # 1. 完整波形图
-        ax1.plot(time_array, audio_array, 'b-', linewidth=0.5)
+        # 1. 完整波形图（按最小/最大值包络抽取，不逐点绘制）
+        bins = min(self.ENVELOPE_BINS, len(audio_array))
+        lo, hi = envelope(audio_array, bins)
+        env_times = np.linspace(0, time_array[-1], bins)
+        ax1.fill_between(env_times, lo, hi, color='b', linewidth=0.5)
         ax1.set_title('完整音频波形')
         ax1.set_xlabel('时间 (秒)')
         ax1.set_ylabel('幅度')
@@ -303,14 +387,9 @@ class LoopbackAudioTester:
                 ax2.set_ylabel('幅度')
                 ax2.grid(True, alpha=0.3)
         
-        # 3. 频谱图
-        fft = np.fft.fft(audio_array)
-        freqs = np.fft.fftfreq(len(audio_array), 1/self.RATE)
-        magnitude = np.abs(fft)
-        
-        # 只显示正频率部分
-        positive_freq_mask = freqs >= 0
-        ax3.semilogx(freqs[positive_freq_mask], 20*np.log10(magnitude[positive_freq_mask] + 1e-10), 'g-')
+        # 3. 频谱图（实数FFT只含非负频率）
+        freqs, magnitude = self._compute_spectrum(audio_array)
+        ax3.semilogx(freqs, 20*np.log10(magnitude + 1e-10), 'g-')
         ax3.set_title('频谱图')
         ax3.set_xlabel('频率 (Hz)')
         ax3.set_ylabel('幅度 (dB)')
@@ -319,14 +398,18 @@ class LoopbackAudioTester:
         
         # 4. RMS随时间变化
         window_size = self.RATE // 10  # 0.1秒窗口
-        rms_values = []
-        rms_times = []
-        
-        for i in range(0, len(audio_array) - window_size, window_size//2):
-            window = audio_array[i:i+window_size]
-            rms = np.sqrt(np.mean(window**2))
-            rms_values.append(rms)
-            rms_times.append(time_array[i + window_size//2] if i + window_size//2 < len(time_array) else time_array[-1])
+        hop = window_size // 2
+        if len(audio_array) > window_size:
+            # 平方的前缀和在窗口两端相减即得各窗口（50%重叠）的平方和，只产生一个与录音等长的数组
+            csum = np.square(audio_array, dtype=np.float64)
+            np.cumsum(csum, out=csum)
+            starts = np.arange(0, len(audio_array) - window_size, hop)
+            before = np.where(starts > 0, csum[starts - 1], 0.0)
+            sums = np.maximum(csum[starts + window_size - 1] - before, 0.0)
+            rms_values = np.sqrt(sums / window_size)
+            rms_times = time_array[starts + hop]
+        else:
+            rms_values = rms_times = np.empty(0)
         
         ax4.plot(rms_times, rms_values, 'm-', linewidth=2)
         ax4.set_title('RMS随时间变化')
@@ -7,11 +7,22 @@
 import sys
 import os
 import tempfile
-import wave
 import numpy as np
+from scipy.io.wavfile import write as wav_write
 from audio_transcriber_refactored import AudioTranscriptionEngine, TranscriptionConfig, AudioSource
 import whisper
 
+# 已加载的Whisper模型，按模型名缓存，各测试共用同一个模型
+_MODEL_CACHE = {}
+
+def _get_model(name):
+    """加载Whisper模型，同名模型只加载一次"""
+    model = _MODEL_CACHE.get(name)
+    if model is None:
+        model = whisper.load_model(name)
+        _MODEL_CACHE[name] = model
+    return model
+
 def create_test_audio_file():
     """创建一个测试音频文件"""
     # 生成1秒的440Hz正弦波（A音符）
@@ -19,17 +30,14 @@ def create_test_audio_file():
     duration = 1.0
     frequency = 440.0
     
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    audio_data = np.sin(2 * np.pi * frequency * t) * 0.3
-    audio_data = (audio_data * 32767).astype(np.int16)
+    # 单精度计算，相位步长和幅度各合并为一个常数
+    t = np.arange(int(sample_rate * duration), dtype=np.float32) * np.float32(2 * np.pi * frequency / sample_rate)
+    audio_data = (np.sin(t) * np.float32(0.3 * 32767)).astype(np.int16)
     
-    # 创建临时WAV文件
+    # 创建临时WAV文件，int16数组直接写为16位PCM
     temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-    with wave.open(temp_file.name, 'wb') as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2)
-        wav_file.setframerate(sample_rate)
-        wav_file.writeframes(audio_data.tobytes())
+    temp_file.close()
+    wav_write(temp_file.name, sample_rate, audio_data)
     
     return temp_file.name
 
@@ -41,7 +49,7 @@ def test_whisper_directly():
     """直接测试whisper模块"""
     print("\n=== 直接测试Whisper模块 ===")
     try:
-        model = whisper.load_model("base")
+        model = _get_model("base")
         print("✓ Whisper模型加载成功")
         
         # 创建测试音频
@@ -87,6 +95,10 @@ def main():
         engine.config = config
         print(f"当前引擎类型: {engine.config.engine_type}")
         
+        # 复用直接测试时已加载的模型，引擎不再重复加载
+        engine.whisper_model = _get_model("base")
+        engine.whisper_backend = "whisper"
+        
         # 测试Whisper模型加载
         print("\n--- 测试AudioTranscriptionEngine中的Whisper ---")
         test_audio_file = create_test_audio_file()
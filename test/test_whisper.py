@@ -6,25 +6,92 @@
 
 import sys
 import os
+import time
+
+_MODEL_CACHE = {}
+
+def _get_model(name, device):
+    """加载Whisper模型到指定设备，同一进程内同名模型只加载一次"""
+    model = _MODEL_CACHE.get((name, device))
+    if model is None:
+        model = whisper.load_model(name, device=device)
+        _MODEL_CACHE[(name, device)] = model
+    return model
+
+def _use_fp16():
+    """只在有Tensor Core的GPU（计算能力7.0及以上）上使用FP16，更早的GPU上FP16反而比FP32慢"""
+    return torch.cuda.is_available() and torch.cuda.get_device_capability(0)[0] >= 7
+
+def _audio_to_device(audio, device):
+    """把16kHz float32音频补齐/截断为30秒后送到模型所在设备
+    
+    GPU上先拷入锁页内存再异步传输，之后的梅尔特征和编码都在设备上完成。
+    """
+    tensor = torch.from_numpy(whisper.pad_or_trim(audio))
+    if device.type == "cuda":
+        tensor = tensor.pin_memory().to(device, non_blocking=True)
+    return tensor
+
+def _compile_encoder(model):
+    """GPU上以torch.compile（reduce-overhead）编译编码器，并用30秒静音预热
+    
+    编码器输入固定为30秒梅尔特征，形状不变，适合CUDA Graphs；失败时恢复未编译的编码器。
+    """
+    if not torch.cuda.is_available() or not hasattr(torch, "compile"):
+        return False
+    eager_encoder = model.encoder
+    try:
+        start_time = time.time()
+        model.encoder = torch.compile(eager_encoder, mode="reduce-overhead")
+        dtype = next(model.parameters()).dtype
+        mel = torch.zeros(1, model.dims.n_mels, whisper.audio.N_FRAMES, device=model.device, dtype=dtype)
+        with torch.inference_mode():
+            model.embed_audio(mel)
+        print(f"✓ 编码器编译完成，耗时: {time.time() - start_time:.1f}秒")
+        return True
+    except Exception as e:
+        model.encoder = eager_encoder
+        print(f"⚠ 编码器编译失败，使用未编译模型: {e}")
+        return False
 
 try:
     import whisper
+    import torch
+    import numpy as np
     print("✓ Whisper模块导入成功")
     
     # 测试模型加载
-    print("正在加载Whisper base模型...")
-    model = whisper.load_model("base")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"正在加载Whisper base模型，设备: {device}...")
+    model = _get_model("base", device)
     print("✓ Whisper base模型加载成功")
     
+    if _use_fp16():
+        model.half()
+    print(f"模型精度: {next(model.parameters()).dtype}")
+    
+    # 按实际运行时的方式编译编码器
+    _compile_encoder(model)
+    
     # 检查模型属性
     print(f"模型设备: {next(model.parameters()).device}")
     print(f"模型类型: {type(model)}")
     
+    # 用1秒静音走一遍设备上的特征提取和编码
+    audio = _audio_to_device(np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32), model.device)
+    with torch.inference_mode():
+        mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels)
+        audio_features = model.embed_audio(mel.unsqueeze(0).to(next(model.parameters()).dtype))
+    print(f"✓ 编码器输出: {tuple(audio_features.shape)}，设备: {audio_features.device}")
+    
+    # 把编码器输出直接交给解码：decode识别出已编码的特征后不再运行编码器，逐词解码共用这一份特征
+    options = whisper.DecodingOptions(fp16=audio_features.dtype == torch.float16, without_timestamps=True)
+    with torch.inference_mode():
+        result = whisper.decode(model, audio_features, options)
+    print(f"✓ 解码完成: {repr(result[0].text)}")
+    
     print("\n=== Whisper测试完成 ===")
     
 except ImportError as e:
     print(f"✗ Whisper模块导入失败: {e}")
-    sys.exit(1)
-except Exception as e:
-    print(f"✗ Whisper模型加载失败: {e}")
     sys.exit(1)
\ No newline at end of file